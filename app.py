@@ -1,16 +1,239 @@
 import sys
 import os
+import importlib.util
 import pickle
-import cv2
-import mediapipe as mp
-import numpy as np
-import pyautogui
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-from threading import Thread
+import queue
+from threading import Thread, Lock
 import time
 
+def check_dependencies():
+    """Check for required packages"""
+    required_packages = {
+        'opencv-python': 'cv2', 
+        'mediapipe': 'mediapipe', 
+        'numpy': 'numpy',
+        'pyautogui': 'pyautogui',
+        'pillow': 'PIL'
+    }
+    
+    # find_spec locates a package without importing it
+    missing_packages = [package for package, module in required_packages.items()
+                        if importlib.util.find_spec(module) is None]
+    
+    if missing_packages:
+        print("Missing required packages. Please install the following packages:")
+        for package in missing_packages:
+            print(f"- {package}")
+        print("\nYou can install them using pip:")
+        print(f"pip install {' '.join(missing_packages)}")
+        input("Press Enter to exit...")
+        sys.exit(1)
+
+# Checked before the imports below so a missing package is reported instead of raising;
+# MediaPipe and pyautogui are slow to load and imported where they are first used
+check_dependencies()
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+class StageQueue:
+    """Bounded queue between two stages with a drop-oldest or block policy"""
+    
+    def __init__(self, maxsize=2, policy="drop_oldest"):
+        self.queue = queue.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+    
+    def put(self, item, is_running=lambda: True):
+        if self.policy == "block":
+            # Back-pressure: wait for the consumer, but give up on shutdown
+            while is_running():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            return
+        
+        # Drop the oldest queued item to make room for the newest one
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+    
+    def get(self, timeout=0.1):
+        """Next item, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class PipelineStage:
+    """One worker thread applying func to every item from its input queue"""
+    
+    def __init__(self, name, func, input_queue, output_queue=None):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.thread = None
+        self.running = False
+        
+        # Counters
+        self.processed = 0
+        self.busy_time = 0.0
+    
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self._run, name=f"pipeline-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def _run(self):
+        while self.running:
+            item = self.input_queue.get()
+            if item is None:
+                continue
+            
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage: {str(e)}")
+                result = None
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+            
+            # A stage returns None to drop the item
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result, lambda: self.running)
+
+class VideoPipeline:
+    """Capture followed by processing stages, each on its own worker thread"""
+    
+    def __init__(self, source, queue_size=2, policy="drop_oldest"):
+        # source provides read() -> (ret, frame) and isOpened(), like VideoCapture
+        self.source = source
+        self.queue_size = queue_size
+        self.policy = policy
+        self.stages = []
+        self.branches = []
+        self.capture_queue = StageQueue(queue_size, policy)
+        self.capture_thread = None
+        self.running = False
+        self.frames_captured = 0
+    
+    def add_stage(self, name, func):
+        """Append a stage to the main line; func(item) returns the item for the next stage"""
+        input_queue = self.stages[-1].output_queue if self.stages else self.capture_queue
+        output_queue = StageQueue(self.queue_size, self.policy)
+        self.stages.append(PipelineStage(name, func, input_queue, output_queue))
+    
+    def add_branch(self, name, func):
+        """Side worker fed explicitly through the returned submit(item) function"""
+        branch = PipelineStage(name, func, StageQueue(self.queue_size, self.policy))
+        self.branches.append(branch)
+        return lambda item: branch.input_queue.put(item, lambda: branch.running)
+    
+    def start(self):
+        self.running = True
+        # The last stage is a sink
+        if self.stages:
+            self.stages[-1].output_queue = None
+        for stage in self.stages + self.branches:
+            stage.start()
+        self.capture_thread = Thread(target=self._capture, name="pipeline-capture")
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+    
+    def stop(self):
+        self.running = False
+        for stage in self.stages + self.branches:
+            stage.running = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=1.0)
+        for stage in self.stages + self.branches:
+            if stage.thread:
+                stage.thread.join(timeout=1.0)
+    
+    def is_alive(self):
+        return self.running and self.capture_thread is not None and self.capture_thread.is_alive()
+    
+    def _capture(self):
+        while self.running and self.source.isOpened():
+            ret, frame = self.source.read()
+            if not ret:
+                continue
+            self.frames_captured += 1
+            self.capture_queue.put(frame, lambda: self.running)
+        self.running = False
+    
+    def stats(self):
+        """Per-stage frame count, mean time per item and items dropped on the way in"""
+        stats = {'capture': {'processed': self.frames_captured}}
+        for stage in self.stages + self.branches:
+            stats[stage.name] = {
+                'processed': stage.processed,
+                'ms_per_item': 1000 * stage.busy_time / stage.processed if stage.processed else 0.0,
+                'dropped': stage.input_queue.dropped
+            }
+        return stats
+
+class VideoSurface:
+    """Persistent PhotoImage on a label, updated in place and sized to the widget"""
+    
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.size = None
+        # Label size beyond the image (border and padding), measured once an image is shown
+        self.inset = None
+        # Downscaled copy of the frame, reused while the display size stays the same
+        self.scaled = None
+    
+    def display_size(self, frame_width, frame_height):
+        """Largest size fitting the label with the frame's aspect ratio, never above the frame's"""
+        width, height = self.label.winfo_width(), self.label.winfo_height()
+        if self.inset is not None:
+            width, height = width - self.inset[0], height - self.inset[1]
+        if width <= 1 or height <= 1:
+            # Not laid out yet
+            return frame_width, frame_height
+        
+        scale = min(width / frame_width, height / frame_height, 1.0)
+        return max(1, int(frame_width * scale)), max(1, int(frame_height * scale))
+    
+    def show(self, frame):
+        """Display an RGB frame; the frame is not kept"""
+        size = self.display_size(frame.shape[1], frame.shape[0])
+        if size != (frame.shape[1], frame.shape[0]):
+            if self.scaled is None or self.scaled.shape[:2] != (size[1], size[0]):
+                self.scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, size, dst=self.scaled, interpolation=cv2.INTER_AREA)
+        
+        # Wrap without copying; paste copies the pixels into the existing Tk image
+        img = Image.frombuffer("RGB", size, frame, "raw", "RGB", 0, 1)
+        if size != self.size:
+            # Only a new widget size creates a new Tk image
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.size = size
+            self.label.configure(image=self.photo)
+            self.label.image = self.photo  # Keep a reference to prevent garbage collection
+            if self.inset is None:
+                self.inset = (max(0, self.label.winfo_reqwidth() - size[0]),
+                              max(0, self.label.winfo_reqheight() - size[1]))
+        else:
+            self.photo.paste(img)
+
 class HandGestureTrainer:
     def __init__(self, root):
         self.root = root
@@ -18,24 +241,40 @@ class HandGestureTrainer:
         self.root.geometry("1200x700")
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        # MediaPipe setup
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.mp_drawing = mp.solutions.drawing_utils
+        # MediaPipe is imported and its graph built on a background thread once the
+        # window is up (see load_model); starting the camera waits for it
+        self.mp_hands = None
+        self.hands = None
+        self.mp_drawing = None
+        self.landmark_style = None
+        self.model_thread = None
+        self.model_error = None
         
         # Camera setup
         self.cap = None
         self.camera_active = False
-        self.thread = None
-        self.stop_thread = False
+        self.pipeline = None
+        # Back-pressure between pipeline stages: "drop_oldest" keeps latency
+        # low, "block" processes every frame at the pace of the slowest stage
+        self.pipeline_policy = "drop_oldest"
+        self.pipeline_queue_size = 2
+        
+        # Widgets are only touched from the main thread: the display stage leaves the
+        # newest frame here and the other stages queue their widget updates, both
+        # applied by refresh_ui every display_interval milliseconds
+        self.display_lock = Lock()
+        self.pending_frame = None
+        self.ui_calls = queue.Queue()
+        self.display_interval = 33
+        self.refresh_id = None
+        # Surface showing the video, None while no view is visible; kept up to date by Tk events
+        # so the pipeline threads can read it without touching widgets
+        self.visible_surface = None
+        self.window_mapped = True
         
         # Training data
         self.gesture_data = {}
+        self.compile_templates()
         self.current_samples = []
         self.is_recording = False
         self.current_gesture_name = ""
@@ -43,12 +282,49 @@ class HandGestureTrainer:
         self.current_action_value = ""
         self.sample_count = 0
         self.required_samples = 30
+        # Action cooldown per hand
+        self.last_action_times = {}
         
         # Load existing gestures if available
         self.load_gestures()
         
         # Create UI
         self.setup_ui()
+        
+        self.root.after_idle(self.start_model_loading)
+    
+    def start_model_loading(self):
+        if self.model_thread is None:
+            self.model_thread = Thread(target=self.load_model, name="model-loader")
+            self.model_thread.daemon = True
+            self.model_thread.start()
+    
+    def load_model(self):
+        """Import MediaPipe and build the Hands graph; runs on the model-loader thread"""
+        try:
+            import mediapipe as mp
+            
+            self.mp_hands = mp.solutions.hands
+            self.mp_drawing = mp.solutions.drawing_utils
+            # Frames are RGB from inference to display, so the default red is given in RGB
+            self.landmark_style = self.mp_drawing.DrawingSpec(color=(255, 0, 0))
+            self.hands = self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7
+            )
+        except Exception as e:
+            self.model_error = e
+    
+    def wait_for_model(self):
+        """Block until MediaPipe is ready; False if it could not be loaded"""
+        self.start_model_loading()
+        self.model_thread.join()
+        if self.model_error is not None:
+            messagebox.showerror("Error", f"Could not load the hand tracking model: {str(self.model_error)}")
+            return False
+        return True
     
     def setup_ui(self):
         # Main frame setup with tabs
@@ -72,6 +348,26 @@ class HandGestureTrainer:
         self.setup_training_tab()
         self.setup_testing_tab()
         self.setup_management_tab()
+        
+        # Track which video view is visible instead of asking Tk for every frame
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.update_visibility())
+        self.root.bind("<Map>", self.on_window_map)
+        self.root.bind("<Unmap>", self.on_window_map)
+        self.update_visibility()
+    
+    def on_window_map(self, event):
+        # Child widgets inherit the root's bindings; only the window itself matters
+        if event.widget is self.root:
+            self.window_mapped = event.type == tk.EventType.Map
+            self.update_visibility()
+    
+    def update_visibility(self):
+        """Recompute which video surface is on screen"""
+        surfaces = {0: self.video_surface, 1: self.test_video_surface}
+        visible = None
+        if self.window_mapped:
+            visible = surfaces.get(self.notebook.index(self.notebook.select()))
+        self.visible_surface = visible
     
     def setup_training_tab(self):
         main_frame = ttk.Frame(self.training_tab)
@@ -87,6 +383,7 @@ class HandGestureTrainer:
         # Video display
         self.video_label = ttk.Label(left_frame)
         self.video_label.pack(fill="both", expand=True, padx=5, pady=5)
+        self.video_surface = VideoSurface(self.video_label)
         
         # Control panel
         control_frame = ttk.LabelFrame(right_frame, text="Training Controls")
@@ -149,6 +446,7 @@ class HandGestureTrainer:
         # Video display for testing
         self.test_video_label = ttk.Label(left_frame)
         self.test_video_label.pack(fill="both", expand=True, padx=5, pady=5)
+        self.test_video_surface = VideoSurface(self.test_video_label)
         
         # Testing controls
         control_frame = ttk.LabelFrame(right_frame, text="Testing Controls")
@@ -221,6 +519,9 @@ class HandGestureTrainer:
     
     def toggle_camera(self):
         if not self.camera_active:
+            if not self.wait_for_model():
+                return
+            
             # Start camera
             self.cap = cv2.VideoCapture(0)
             if not self.cap.isOpened():
@@ -231,16 +532,13 @@ class HandGestureTrainer:
             self.camera_button.config(text="Stop Camera")
             self.record_button.config(state="normal")
             
-            # Start video processing thread
-            self.stop_thread = False
-            self.thread = Thread(target=self.process_video)
-            self.thread.daemon = True
-            self.thread.start()
+            # Start the video processing pipeline
+            self.process_video()
         else:
             # Stop camera
-            self.stop_thread = True
-            if self.thread:
-                self.thread.join(timeout=1.0)
+            if self.pipeline:
+                self.pipeline.stop()
+            self.stop_refresh()
             
             if self.cap:
                 self.cap.release()
@@ -252,74 +550,132 @@ class HandGestureTrainer:
             
             # Reset the video display
             blank = np.zeros((480, 640, 3), dtype=np.uint8)
-            self.update_video(blank, self.video_label)
-            self.update_video(blank, self.test_video_label)
+            self.update_video(blank, self.video_surface)
+            self.update_video(blank, self.test_video_surface)
     
     def process_video(self):
-        while not self.stop_thread and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            # Flip the frame horizontally for a more natural view
-            frame = cv2.flip(frame, 1)
-            
-            # Process with MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-            
-            # Draw hand landmarks
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    self.mp_drawing.draw_landmarks(
-                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                    
-                    # Extract hand landmarks for training/testing
-                    if self.is_recording and len(self.current_samples) < self.required_samples:
-                        landmarks = []
-                        for landmark in hand_landmarks.landmark:
-                            landmarks.append([landmark.x, landmark.y, landmark.z])
-                        
-                        self.current_samples.append(landmarks)
-                        self.sample_count = len(self.current_samples)
-                        self.sample_count_var.set(f"{self.sample_count}/{self.required_samples}")
-                        
-                        if self.sample_count >= self.required_samples:
-                            self.is_recording = False
-                            self.record_button.config(text="Start Recording")
-                            self.save_button.config(state="normal")
-                            self.status_var.set("Samples collected! Ready to save.")
-                    
-                    # For testing mode
-                    if self.testing_active:
-                        landmarks = []
-                        for landmark in hand_landmarks.landmark:
-                            landmarks.append([landmark.x, landmark.y, landmark.z])
-                        
-                        self.recognize_gesture(landmarks, frame)
-            
-            # Display status text
-            if self.is_recording:
-                cv2.putText(frame, f"Recording: {self.sample_count}/{self.required_samples}", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            
-            # Display the resulting frame
-            if self.notebook.index(self.notebook.select()) == 0:  # Training tab
-                self.update_video(frame, self.video_label)
-            elif self.notebook.index(self.notebook.select()) == 1:  # Testing tab
-                self.update_video(frame, self.test_video_label)
-            
-            time.sleep(0.01)  # Small delay to reduce CPU usage
+        """Run capture, inference, analysis, drawing and display as pipelined stages"""
+        self.pipeline = VideoPipeline(self.cap, queue_size=self.pipeline_queue_size,
+                                      policy=self.pipeline_policy)
+        self.pipeline.add_stage("inference", self.detect_hands)
+        self.pipeline.add_stage("analysis", self.analyze_frame)
+        self.pipeline.add_stage("drawing", self.draw_frame)
+        self.pipeline.add_stage("display", self.display_frame)
+        # Actions run off the main line so a slow key press never stalls the video
+        self.dispatch_action = self.pipeline.add_branch("actions", self.run_action)
+        self.pipeline.start()
+        self.refresh_id = self.root.after(self.display_interval, self.refresh_ui)
     
-    def update_video(self, frame, label):
-        # Convert the frame to a format compatible with tkinter
-        img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(img)
-        img = ImageTk.PhotoImage(image=img)
+    def detect_hands(self, frame):
+        # Convert to RGB once, in place; the same frame is used for inference, drawing and display
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        # Flip the frame horizontally for a more natural view
+        cv2.flip(frame, 1, dst=frame)
+        
+        # Process with MediaPipe
+        results = self.hands.process(frame)
         
-        # Update the label
-        label.configure(image=img)
-        label.image = img  # Keep a reference to prevent garbage collection
+        # MediaPipe's handedness label identifies each hand; a second hand
+        # with the same label falls back to its position in the list
+        labels = [h.classification[0].label for h in results.multi_handedness or []]
+        hand_ids = [label if label not in labels[:i] else f"{label} {i + 1}" for i, label in enumerate(labels)]
+        
+        return {'frame': frame, 'hands': results.multi_hand_landmarks or [], 'hand_ids': hand_ids, 'overlays': []}
+    
+    def analyze_frame(self, packet):
+        # Extract hand landmarks for training/testing
+        hands = []
+        for hand_landmarks in packet['hands']:
+            landmarks = []
+            for landmark in hand_landmarks.landmark:
+                landmarks.append([landmark.x, landmark.y, landmark.z])
+            hands.append(landmarks)
+        
+        # Gestures are trained on one hand
+        if hands and self.is_recording and len(self.current_samples) < self.required_samples:
+            self.current_samples.append(hands[0])
+            self.sample_count = len(self.current_samples)
+            self.call(self.sample_count_var.set, f"{self.sample_count}/{self.required_samples}")
+            
+            if self.sample_count >= self.required_samples:
+                self.is_recording = False
+                self.call(self.record_button.config, text="Start Recording")
+                self.call(self.save_button.config, state="normal")
+                self.call(self.status_var.set, "Samples collected! Ready to save.")
+        
+        # For testing mode
+        if hands and self.testing_active:
+            self.recognize_gestures(hands, packet)
+        
+        # Display status text
+        if self.is_recording:
+            packet['overlays'].append((f"Recording: {self.sample_count}/{self.required_samples}", (255, 0, 0)))
+        return packet
+    
+    def draw_frame(self, packet):
+        if self.visible_surface is None:
+            # Nothing shows the video: recognition already ran, so the frame is done
+            return None
+        frame = packet['frame']
+        
+        # Draw hand landmarks
+        for hand_landmarks in packet['hands']:
+            self.mp_drawing.draw_landmarks(
+                frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS, self.landmark_style)
+        
+        for line, (text, color) in enumerate(packet['overlays']):
+            cv2.putText(frame, text, (10, 30 + 25 * line), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        return packet
+    
+    def display_frame(self, packet):
+        # Hand the frame to the main thread, replacing one it has not shown yet
+        with self.display_lock:
+            self.pending_frame = packet['frame']
+    
+    def call(self, func, *args, **kwargs):
+        """Run func on the main thread from any thread"""
+        self.ui_calls.put((func, args, kwargs))
+    
+    def run_ui_calls(self):
+        while True:
+            try:
+                func, args, kwargs = self.ui_calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"Error updating the UI: {str(e)}")
+    
+    def refresh_ui(self):
+        """Apply queued widget updates and show the newest frame; runs on the main thread"""
+        self.run_ui_calls()
+        
+        with self.display_lock:
+            frame, self.pending_frame = self.pending_frame, None
+        # Display the resulting frame on whichever view is visible now
+        surface = self.visible_surface
+        if frame is not None and surface is not None:
+            self.update_video(frame, surface)
+        
+        self.refresh_id = self.root.after(self.display_interval, self.refresh_ui)
+    
+    def stop_refresh(self):
+        """Stop refreshing once the pipeline has stopped, applying its last widget updates"""
+        if self.refresh_id is not None:
+            self.root.after_cancel(self.refresh_id)
+            self.refresh_id = None
+        self.run_ui_calls()
+        with self.display_lock:
+            self.pending_frame = None
+    
+    def run_action(self, action):
+        action_type, action_value, hand_id = action
+        self.execute_action(action_type, action_value, hand_id)
+    
+    def update_video(self, frame, surface):
+        # Frames are already RGB, which the surface displays as is
+        surface.show(frame)
     
     def toggle_recording(self):
         if not self.is_recording:
@@ -373,6 +729,7 @@ class HandGestureTrainer:
             'action_type': self.current_action_type,
             'action_value': self.current_action_value
         }
+        self.compile_templates()
         
         # Save to file
         try:
@@ -392,7 +749,7 @@ class HandGestureTrainer:
             
             # Update gesture list
             self.update_gesture_list()
-            
+        
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save gesture: {str(e)}")
     
@@ -401,9 +758,12 @@ class HandGestureTrainer:
             if os.path.exists('gestures/gestures.pkl'):
                 with open('gestures/gestures.pkl', 'rb') as f:
                     self.gesture_data = pickle.load(f)
+                
+                self.compile_templates()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load gestures: {str(e)}")
             self.gesture_data = {}
+            self.compile_templates()
     
     def update_gesture_list(self):
         # Clear existing items
@@ -432,6 +792,7 @@ class HandGestureTrainer:
         if messagebox.askyesno("Confirm", f"Delete gesture '{gesture_name}'?"):
             if gesture_name in self.gesture_data:
                 del self.gesture_data[gesture_name]
+                self.compile_templates()
                 
                 # Save changes
                 try:
@@ -440,7 +801,7 @@ class HandGestureTrainer:
                     
                     # Update the list
                     self.update_gesture_list()
-                    
+                
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to save changes: {str(e)}")
     
@@ -488,6 +849,7 @@ class HandGestureTrainer:
                     for name, data in imported_data.items():
                         if name not in self.gesture_data:
                             self.gesture_data[name] = data
+                self.compile_templates()
                 
                 # Save changes
                 with open('gestures/gestures.pkl', 'wb') as f:
@@ -516,74 +878,98 @@ class HandGestureTrainer:
             self.detected_action_var.set("None")
             self.confidence_var.set("0%")
     
-    def recognize_gesture(self, landmarks, frame):
-        """Compare current hand landmarks with saved gestures"""
-        if not self.gesture_data:
+    def compile_templates(self):
+        """Pack every stored sample into one contiguous template matrix"""
+        names = []
+        blocks = []
+        actions = []
+        for name, data in list(self.gesture_data.items()):
+            samples = data['samples']
+            if len(samples) == 0:
+                continue
+            # Dynamic gestures recorded in the gest trainer are motions, not poses;
+            # this app only recognizes static poses
+            if data.get('type', 'static') == 'dynamic':
+                continue
+            names.append(name)
+            blocks.append(np.asarray(samples, dtype=np.float32).reshape(len(samples), -1))
+            actions.append((data['action_type'], data['action_value']))
+        
+        if blocks:
+            templates = np.ascontiguousarray(np.concatenate(blocks))
+            sample_counts = np.array([len(block) for block in blocks])
+        else:
+            templates = np.empty((0, 0), dtype=np.float32)
+            sample_counts = np.empty(0, dtype=np.int64)
+        gesture_offsets = np.concatenate(([0], np.cumsum(sample_counts)[:-1])).astype(np.int64)
+        
+        # Published with a single assignment: the analysis thread never sees
+        # the names of one library with the templates of another
+        self.compiled_templates = (names, templates, sample_counts, gesture_offsets, actions)
+    
+    def recognize_gestures(self, hands, packet):
+        """Compare the landmarks of every detected hand with saved gestures"""
+        gesture_names, templates, sample_counts, gesture_offsets, actions = self.compiled_templates
+        if not gesture_names:
             return
         
-        best_match = None
-        best_score = float('inf')
+        queries = np.asarray(hands, dtype=np.float32).reshape(len(hands), -1)
         
-        # Compare with each saved gesture
-        for name, data in self.gesture_data.items():
-            samples = data['samples']
-            
-            # Calculate minimum distance to any sample
-            sample_scores = []
-            for sample in samples:
-                # Calculate Euclidean distance between landmarks
-                total_distance = 0
-                for i in range(min(len(landmarks), len(sample))):
-                    dist = sum((a - b) ** 2 for a, b in zip(landmarks[i], sample[i]))
-                    total_distance += dist
-                
-                sample_scores.append(total_distance)
-            
-            # Get average score across samples
-            avg_score = sum(sample_scores) / len(sample_scores)
-            
-            if avg_score < best_score:
-                best_score = avg_score
-                best_match = name
+        # Squared Euclidean distance from every hand to every sample in a single pass
+        diff = templates[None, :, :] - queries[:, None, :]
+        sample_scores = np.einsum('hij,hij->hi', diff, diff)
+        
+        # Average score across the samples of each gesture
+        avg_scores = np.add.reduceat(sample_scores, gesture_offsets, axis=1) / sample_counts
+        best_indices = np.argmin(avg_scores, axis=1)
         
         # Determine if the match is good enough
         # This threshold might need tuning based on testing
         threshold = 0.1
-        confidence = max(0, min(100, int(100 * (1 - best_score / threshold))))
         
-        if best_score < threshold and best_match:
-            # Update UI
-            self.detected_gesture_var.set(best_match)
-            
-            action_type = self.gesture_data[best_match]['action_type']
-            action_value = self.gesture_data[best_match]['action_value']
-            self.detected_action_var.set(f"{action_type}: {action_value}")
-            self.confidence_var.set(f"{confidence}%")
+        detected = []
+        for hand_id, best_index, scores in zip(packet['hand_ids'], best_indices, avg_scores):
+            best_match = gesture_names[best_index]
+            best_score = float(scores[best_index])
+            confidence = max(0, min(100, int(100 * (1 - best_score / threshold))))
             
-            # Display on frame
-            cv2.putText(frame, f"Gesture: {best_match}", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Execute the action if confidence is high enough
-            if confidence > 70:
-                self.execute_action(action_type, action_value)
+            if best_score < threshold and best_match:
+                action_type, action_value = actions[best_index]
+                detected.append((hand_id, best_match, f"{action_type}: {action_value}", confidence))
+                
+                # Display on frame
+                packet['overlays'].append((f"{hand_id}: {best_match}", (0, 255, 0)))
+                
+                # Execute the action if confidence is high enough
+                if confidence > 70:
+                    self.dispatch_action((action_type, action_value, hand_id))
+            else:
+                detected.append((hand_id, "Unknown", "None", confidence))
+                packet['overlays'].append((f"{hand_id}: unknown gesture", (255, 0, 0)))
+        
+        # Update UI from the main thread; hands are only named when there is more than one
+        if len(detected) == 1:
+            _, gesture, action, confidence = detected[0]
+            self.call(self.detected_gesture_var.set, gesture)
+            self.call(self.detected_action_var.set, action)
+            self.call(self.confidence_var.set, f"{confidence}%")
         else:
-            self.detected_gesture_var.set("Unknown")
-            self.detected_action_var.set("None")
-            self.confidence_var.set(f"{confidence}%")
-            
-            cv2.putText(frame, "Unknown gesture", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            self.call(self.detected_gesture_var.set, ", ".join(f"{hand}: {gesture}" for hand, gesture, _, _ in detected))
+            self.call(self.detected_action_var.set, ", ".join(f"{hand}: {action}" for hand, _, action, _ in detected))
+            self.call(self.confidence_var.set, ", ".join(f"{confidence}%" for _, _, _, confidence in detected))
     
-    def execute_action(self, action_type, action_value):
+    def execute_action(self, action_type, action_value, hand_id=None):
         """Execute the associated action for a recognized gesture"""
         try:
-            # Add a cooldown to prevent rapid-fire actions
+            # Imported on first use: pyautogui is slow to load and only needed once actions fire
+            import pyautogui
+            
+            # Add a cooldown to prevent rapid-fire actions; each hand has its own
             current_time = time.time()
-            if hasattr(self, 'last_action_time') and current_time - self.last_action_time < 1.0:
+            if current_time - self.last_action_times.get(hand_id, 0) < 1.0:
                 return
             
-            self.last_action_time = current_time
+            self.last_action_times[hand_id] = current_time
             
             if action_type == "keyboard":
                 pyautogui.press(action_value)
@@ -605,9 +991,9 @@ class HandGestureTrainer:
     
     def on_closing(self):
         """Handle window closing"""
-        self.stop_thread = True
-        if self.thread:
-            self.thread.join(timeout=1.0)
+        if self.pipeline:
+            self.pipeline.stop()
+        self.stop_refresh()
         
         if self.cap and self.cap.isOpened():
             self.cap.release()
@@ -615,31 +1001,6 @@ class HandGestureTrainer:
         self.root.destroy()
 
 def main():
-    # Check for required packages
-    required_packages = {
-        'opencv-python': 'cv2', 
-        'mediapipe': 'mediapipe', 
-        'numpy': 'numpy',
-        'pyautogui': 'pyautogui',
-        'pillow': 'PIL'
-    }
-    
-    missing_packages = []
-    for package, module in required_packages.items():
-        try:
-            __import__(module)
-        except ImportError:
-            missing_packages.append(package)
-    
-    if missing_packages:
-        print("Missing required packages. Please install the following packages:")
-        for package in missing_packages:
-            print(f"- {package}")
-        print("\nYou can install them using pip:")
-        print(f"pip install {' '.join(missing_packages)}")
-        input("Press Enter to exit...")
-        sys.exit(1)
-    
     # Start the application
     root = tk.Tk()
     app = HandGestureTrainer(root)
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+from gesture_recognizer import GestureRecognizer
+from frame_sources import open_frame_source, SyntheticSource
+from frame_buffers import FrameBufferPool
+from frame_grabber import LatestFrameGrabber
+from roi_tracker import HandROITracker
+from video_pipeline import VideoPipeline
+from runtime import build_detector
+
+def run_benchmark(source, gestures_path='gestures/gestures.pkl', realtime=False):
+    """Push every frame of source through detection and recognition without any UI"""
+    recognizer = GestureRecognizer()
+    if os.path.exists(gestures_path):
+        with open(gestures_path, 'rb') as f:
+            recognizer.set_gesture_data(pickle.load(f))
+    
+    tracker = HandROITracker(build_detector(), detect_roi=build_detector())
+    buffers = FrameBufferPool()
+    grabber = LatestFrameGrabber(source, buffer_pool=buffers, mirror=True, lossless=not realtime)
+    pipeline = VideoPipeline(grabber, policy="drop_oldest" if realtime else "block",
+                             on_drop=lambda item: buffers.release(item['frame'] if isinstance(item, dict) else item))
+    
+    def detect_hands(frame):
+        landmarks, _ = tracker.process(frame)
+        return {'frame': frame, 'landmarks': landmarks}
+    
+    def recognize(packet):
+        for hand in packet['landmarks']:
+            recognizer.recognize(hand.tolist())
+        buffers.release(packet['frame'])
+    
+    pipeline.add_stage("inference", detect_hands)
+    pipeline.add_stage("recognition", recognize)
+    
+    start = time.perf_counter()
+    grabber.start()
+    pipeline.start()
+    pipeline.join()
+    elapsed = time.perf_counter() - start
+    pipeline.stop()
+    grabber.stop()
+    source.release()
+    
+    stats = pipeline.stats()
+    stats['total'] = {
+        'frames': stats['recognition']['processed'],
+        'seconds': elapsed,
+        'fps': stats['recognition']['processed'] / elapsed if elapsed else 0.0,
+        'inference_pixel_ratio': tracker.inference_ratio()
+    }
+    stats['buffers'] = buffers.stats()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure video processing throughput without a UI")
+    parser.add_argument("source", nargs="?", default="synthetic",
+                        help="camera index, video file, image directory or 'synthetic'")
+    parser.add_argument("--realtime", action="store_true", help="pace the source at its frame rate")
+    parser.add_argument("--frames", type=int, default=300, help="number of synthetic frames")
+    parser.add_argument("--gestures", default="gestures/gestures.pkl", help="gesture library to recognize against")
+    args = parser.parse_args()
+    
+    if args.source == "synthetic":
+        source = SyntheticSource(realtime=args.realtime, frames=args.frames)
+    else:
+        source = open_frame_source(args.source, realtime=args.realtime)
+    if not source.isOpened():
+        print(f"Error opening source: {args.source}")
+        sys.exit(1)
+    
+    for name, values in run_benchmark(source, args.gestures, args.realtime).items():
+        print(f"{name}: " + ", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                       for key, value in values.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from threading import Lock
+import numpy as np
+
+class FrameBufferPool:
+    """Recycles full-frame arrays so the steady-state frame path allocates nothing"""
+    
+    def __init__(self, dtype=np.uint8):
+        self.dtype = dtype
+        self.shape = None
+        self.free = []
+        self.lock = Lock()
+        
+        # Counters
+        self.acquired = 0
+        self.allocations = 0
+    
+    def acquire(self, shape):
+        """A buffer of the given shape, reused when one is free"""
+        with self.lock:
+            self.acquired += 1
+            if shape != self.shape:
+                # Resolution changed: drop the buffers of the old size
+                self.shape = shape
+                self.free = []
+            if self.free:
+                return self.free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=self.dtype)
+    
+    def release(self, buffer):
+        """Hand a buffer back once nothing reads it any more"""
+        with self.lock:
+            if buffer is not None and buffer.shape == self.shape:
+                self.free.append(buffer)
+    
+    def stats(self):
+        return {
+            'acquired': self.acquired,
+            'allocations': self.allocations,
+            'allocations_per_frame': self.allocations / self.acquired if self.acquired else 0.0,
+            'free': len(self.free)
+        }
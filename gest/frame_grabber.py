@@ -0,0 +1,110 @@
+import time
+import cv2
+from threading import Thread, Condition
+
+class LatestFrameGrabber:
+    """Reads a capture device on its own thread and keeps only the newest frame"""
+    
+    def __init__(self, cap, buffer_pool=None, mirror=False, lossless=False):
+        self.cap = cap
+        # Lossless waits for every frame to be read instead of replacing it,
+        # for sources that are not realtime (benchmarks, replays)
+        self.lossless = lossless
+        self.running = False
+        self.thread = None
+        
+        # With a buffer pool, frames are delivered as (optionally mirrored) RGB
+        # in recycled buffers; the reader releases them back to the pool
+        self.buffer_pool = buffer_pool
+        self.mirror = mirror
+        # Raw frames alternate between two decode buffers: one sits in the slot
+        # while the next is decoded into the other. Only the frame actually
+        # read is converted, so frames replaced unread cost no conversion
+        self.bgr_scratch = [None, None]
+        self.slot_index = None
+        self.rgb_scratch = None
+        
+        # Single-slot buffer: a new frame replaces one nobody has read yet
+        self.condition = Condition()
+        self.frame = None
+        self.frame_id = 0
+        self.read_id = 0
+        self.capture_time = 0
+        
+        # Counters
+        self.frames_captured = 0
+        self.frames_dropped = 0
+    
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self._capture_loop)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+    
+    def isOpened(self):
+        # Stays open until the last captured frame has been read
+        return self.running or self.frame_id != self.read_id
+    
+    def _capture_loop(self):
+        while self.running:
+            if self.buffer_pool is None:
+                ret, frame = self.cap.read()
+            else:
+                # Never decode into the buffer in the slot, which a reader may be converting
+                target = 1 if self.slot_index == 0 else 0
+                ret, frame = self.cap.read(self.bgr_scratch[target])
+                if ret:
+                    self.bgr_scratch[target] = frame
+            with self.condition:
+                if self.lossless:
+                    self.condition.wait_for(lambda: self.frame_id == self.read_id or not self.running)
+                if not ret:
+                    self.running = False
+                    self.condition.notify_all()
+                    break
+                
+                if self.frame_id != self.read_id:
+                    # The previous frame was never picked up
+                    self.frames_dropped += 1
+                self.frame = frame
+                if self.buffer_pool is not None:
+                    self.slot_index = target
+                self.frame_id += 1
+                self.frames_captured += 1
+                self.capture_time = time.time()
+                self.condition.notify_all()
+    
+    def _convert(self, frame):
+        """Convert a raw frame once, straight into a pooled buffer"""
+        buffer = self.buffer_pool.acquire(frame.shape)
+        if self.mirror:
+            if self.rgb_scratch is None or self.rgb_scratch.shape != frame.shape:
+                self.rgb_scratch = frame.copy()
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_scratch)
+            cv2.flip(self.rgb_scratch, 1, dst=buffer)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=buffer)
+        return buffer
+    
+    def read(self, timeout=1.0):
+        """Wait for a frame newer than the last one returned, like VideoCapture.read"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.frame_id != self.read_id or not self.running, timeout)
+            if self.frame_id == self.read_id:
+                return False, None
+            self.read_id = self.frame_id
+            frame = self.frame
+            if self.buffer_pool is not None:
+                # Converted under the lock: once the slot moves on, this buffer is decoded into again
+                frame = self._convert(frame)
+            if self.lossless:
+                # Let the capture thread deliver the next frame
+                self.condition.notify_all()
+            return True, frame
@@ -0,0 +1,68 @@
+import time
+from collections import deque
+from threading import Event
+
+class FrameRateScheduler:
+    """Paces frame processing at a target rate, dropping to an idle rate while no hand is seen"""
+    
+    def __init__(self, target_fps=30, idle_fps=5, idle_after=60, window=2.0):
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        # Consecutive frames without a hand before switching to the idle rate
+        self.idle_after = idle_after
+        self.window = window
+        
+        self.idle = False
+        self.frames_without_hand = 0
+        self.next_frame_time = None
+        self.wake_event = Event()
+        self.frame_times = deque()
+    
+    def interval(self):
+        return 1.0 / (self.idle_fps if self.idle else self.target_fps)
+    
+    def wait(self):
+        """Block until the next frame is due; returns at once if the loop is already behind"""
+        now = time.perf_counter()
+        if self.next_frame_time is None:
+            self.next_frame_time = now
+        
+        delay = self.next_frame_time - now
+        if delay > 0:
+            # A hand appearing while idle ends the wait early
+            self.wake_event.wait(delay)
+        self.wake_event.clear()
+        
+        now = time.perf_counter()
+        # Schedule from the ideal time so jitter doesn't accumulate, but never try to catch up a backlog
+        self.next_frame_time = max(self.next_frame_time + self.interval(), now)
+        self._record(now)
+    
+    def report(self, hand_present):
+        """Feed back whether the last processed frame contained a hand"""
+        if hand_present:
+            self.frames_without_hand = 0
+            if self.idle:
+                self.idle = False
+                self.next_frame_time = time.perf_counter()
+                self.wake_event.set()
+        else:
+            self.frames_without_hand += 1
+            if not self.idle and self.frames_without_hand >= self.idle_after:
+                self.idle = True
+    
+    def wake(self):
+        """Return to the full rate immediately, e.g. when the user starts recording"""
+        self.report(True)
+    
+    def effective_fps(self):
+        """Frames per second actually scheduled over the last few seconds"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+    
+    def _record(self, now):
+        self.frame_times.append(now)
+        while self.frame_times and now - self.frame_times[0] > self.window:
+            self.frame_times.popleft()
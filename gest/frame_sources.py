@@ -0,0 +1,138 @@
+import os
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class FrameSource:
+    """VideoCapture-like frame source; realtime sources are paced at their frame rate"""
+    
+    def __init__(self, fps=30.0, realtime=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.opened = True
+        self.frames_read = 0
+        self.next_frame_time = None
+    
+    def isOpened(self):
+        return self.opened
+    
+    def release(self):
+        self.opened = False
+    
+    def read(self, image=None):
+        """Next frame as (ret, frame); image is an optional buffer to decode into"""
+        if not self.opened:
+            return False, None
+        if self.realtime:
+            self._pace()
+        ret, frame = self._next_frame(image)
+        if not ret:
+            self.opened = False
+            return False, None
+        self.frames_read += 1
+        return True, frame
+    
+    def _pace(self):
+        now = time.perf_counter()
+        if self.next_frame_time is None:
+            self.next_frame_time = now
+        if self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
+        interval = 1.0 / self.fps
+        # Keep to the nominal schedule, but never build up more than one frame of backlog
+        self.next_frame_time = max(self.next_frame_time + interval, time.perf_counter() - interval)
+    
+    def _next_frame(self, image):
+        raise NotImplementedError
+
+class CameraSource(FrameSource):
+    """Live camera; the device itself sets the pace, so it is always realtime"""
+    
+    def __init__(self, index=0):
+        super().__init__(realtime=False)
+        self.cap = cv2.VideoCapture(index)
+        self.opened = self.cap.isOpened()
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+    
+    def release(self):
+        super().release()
+        self.cap.release()
+    
+    def _next_frame(self, image):
+        return self.cap.read(image)
+
+class VideoFileSource(FrameSource):
+    """Frames of a video file, at the file's frame rate or as fast as they decode"""
+    
+    def __init__(self, path, realtime=True, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        self.opened = self.cap.isOpened()
+        self.loop = loop
+    
+    def release(self):
+        super().release()
+        self.cap.release()
+    
+    def _next_frame(self, image):
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop and self.frames_read > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        return ret, frame
+
+class ImageDirectorySource(FrameSource):
+    """Image files of a directory in name order, played as a sequence"""
+    
+    def __init__(self, directory, fps=30.0, realtime=True, loop=False):
+        super().__init__(fps, realtime)
+        self.paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.opened = bool(self.paths)
+        self.loop = loop
+        self.index = 0
+    
+    def _next_frame(self, image):
+        if self.index >= len(self.paths):
+            if not self.loop:
+                return False, None
+            self.index = 0
+        frame = cv2.imread(self.paths[self.index])
+        self.index += 1
+        return frame is not None, frame
+
+class SyntheticSource(FrameSource):
+    """Generated frames with a moving bright patch; needs no camera or media files"""
+    
+    def __init__(self, width=640, height=480, fps=30.0, realtime=True, frames=None):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        # None generates frames until released
+        self.frames = frames
+    
+    def _next_frame(self, image):
+        if self.frames is not None and self.frames_read >= self.frames:
+            return False, None
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        
+        # Gradient background with a patch circling the centre
+        image[:] = (self.frames_read * 3) % 64
+        angle = self.frames_read * 2 * np.pi / 90
+        x = int(self.width / 2 + self.width / 4 * np.cos(angle))
+        y = int(self.height / 2 + self.height / 4 * np.sin(angle))
+        cv2.circle(image, (x, y), min(self.width, self.height) // 8, (200, 180, 160), -1)
+        return True, image
+
+def open_frame_source(spec, realtime=True, loop=False):
+    """Source for a camera index, "synthetic", an image directory or a video file"""
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec))
+    if spec == "synthetic":
+        return SyntheticSource(realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime, loop=loop)
+    return VideoFileSource(spec, realtime=realtime, loop=loop)
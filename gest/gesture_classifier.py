@@ -0,0 +1,79 @@
+import os
+import hashlib
+import numpy as np
+
+class SoftmaxClassifier:
+    """Multinomial logistic regression over gesture feature vectors"""
+    
+    def __init__(self, l2=1e-3, learning_rate=0.5, epochs=500):
+        self.l2 = l2
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.weights = None
+        self.bias = None
+        self.mean = None
+        self.scale = None
+        self.library_hash = None
+    
+    def fit(self, features, labels, n_classes):
+        """Train on (N, D) features with integer labels in [0, n_classes)"""
+        features = np.asarray(features, dtype=np.float32)
+        # Standardize so one learning rate suits every feature space
+        self.mean = features.mean(axis=0)
+        std = features.std(axis=0)
+        # Constant columns (e.g. the wrist depth, always 0) are left unscaled
+        self.scale = np.where(std > 1e-6, std, 1.0).astype(np.float32)
+        x = (features - self.mean) / self.scale
+        targets = np.eye(n_classes, dtype=np.float32)[labels]
+        
+        self.weights = np.zeros((x.shape[1], n_classes), dtype=np.float32)
+        self.bias = np.zeros(n_classes, dtype=np.float32)
+        for _ in range(self.epochs):
+            # Full-batch gradient descent on the regularized cross-entropy
+            error = (self._softmax(x @ self.weights + self.bias) - targets) / len(x)
+            self.weights -= self.learning_rate * (x.T @ error + self.l2 * self.weights)
+            self.bias -= self.learning_rate * error.sum(axis=0)
+        return self
+    
+    def predict_proba(self, features):
+        """Class probabilities for (N, D) features"""
+        x = (np.asarray(features, dtype=np.float32) - self.mean) / self.scale
+        return self._softmax(x @ self.weights + self.bias)
+    
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+    
+    def save(self, path):
+        """Persist the weights together with the hash of the library they came from"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as f:
+            np.savez(f, weights=self.weights, bias=self.bias, mean=self.mean,
+                     scale=self.scale, library_hash=np.array(self.library_hash))
+    
+    @classmethod
+    def load(cls, path):
+        """Load a persisted model, or return None if there is none"""
+        if not os.path.exists(path):
+            return None
+        model = cls()
+        with np.load(path) as stored:
+            model.weights = stored['weights']
+            model.bias = stored['bias']
+            model.mean = stored['mean']
+            model.scale = stored['scale']
+            model.library_hash = str(stored['library_hash'])
+        return model
+
+def library_hash(names, features, labels, feature_space):
+    """Fingerprint of the training set, used to decide whether a saved model is still valid"""
+    digest = hashlib.sha1()
+    digest.update(feature_space.encode())
+    digest.update("\0".join(names).encode())
+    digest.update(np.ascontiguousarray(features, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(labels, dtype=np.int64).tobytes())
+    return digest.hexdigest()
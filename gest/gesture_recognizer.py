@@ -1,50 +1,573 @@
+import sys
+import copy
 import time
-import pyautogui
+from collections import deque
+from threading import RLock
+import numpy as np
+from gesture_classifier import SoftmaxClassifier, library_hash
+
+def condense_samples(samples, n_medoids=5, iterations=10):
+    """Reduce recorded samples to a centroid, its spread and a few medoids"""
+    points = np.asarray(samples, dtype=np.float64).reshape(len(samples), -1)
+    centroid = points.mean(axis=0)
+    # Mean squared distance to the centroid: the average distance to all
+    # samples equals the distance to the centroid plus this spread
+    spread = float(((points - centroid) ** 2).sum(axis=1).mean())
+    
+    # k-medoids (alternating assignment / medoid update), seeded with the
+    # sample closest to the centroid followed by farthest-point picks
+    n_medoids = min(n_medoids, len(points))
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b needs only the (n, n) result, not an
+    # (n, n, features) difference tensor; centering first limits cancellation
+    centered = points - centroid
+    norms = np.einsum('ij,ij->i', centered, centered)
+    pairwise = norms[:, None] + norms[None, :] - 2 * (centered @ centered.T)
+    np.maximum(pairwise, 0, out=pairwise)
+    np.fill_diagonal(pairwise, 0)
+    medoids = [int(np.argmin(((points - centroid) ** 2).sum(axis=1)))]
+    while len(medoids) < n_medoids:
+        medoids.append(int(np.argmax(pairwise[:, medoids].min(axis=1))))
+    
+    for _ in range(iterations):
+        assignment = np.argmin(pairwise[:, medoids], axis=1)
+        updated = []
+        for cluster in range(len(medoids)):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members) == 0:
+                updated.append(medoids[cluster])
+                continue
+            costs = pairwise[np.ix_(members, members)].sum(axis=1)
+            updated.append(int(members[np.argmin(costs)]))
+        if updated == medoids:
+            break
+        medoids = updated
+    
+    shape = np.shape(samples)[1:]
+    return {
+        'centroid': centroid.reshape(shape).tolist(),
+        'spread': spread,
+        'medoids': [points[i].reshape(shape).tolist() for i in medoids]
+    }
+
+# Landmark indices used by the invariant descriptor and the pruning cascade
+WRIST = 0
+MIDDLE_FINGER_MCP = 9
+FINGERTIPS = [4, 8, 12, 16, 20]
+
+class TemplateMatrix:
+    """Template rows stored as float32, float16 or int8 with a per-column scale"""
+    
+    def __init__(self, data, scale=None, offset=None):
+        self.data = data
+        # int8 only: value = data * scale + offset, per column
+        self.scale = scale
+        self.offset = offset
+    
+    @classmethod
+    def from_array(cls, matrix, dtype="float32"):
+        """Store an (N, D) matrix in the given layout"""
+        if dtype == "float32":
+            return cls(np.ascontiguousarray(matrix, dtype=np.float32))
+        if dtype == "float16":
+            return cls(np.ascontiguousarray(matrix, dtype=np.float16))
+        
+        # int8: map each column's [min, max] range onto [-127, 127]
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if len(matrix) == 0:
+            return cls(np.zeros(matrix.shape, dtype=np.int8),
+                       np.ones(matrix.shape[1], dtype=np.float32), np.zeros(matrix.shape[1], dtype=np.float32))
+        low = matrix.min(axis=0)
+        high = matrix.max(axis=0)
+        offset = (high + low) / 2
+        scale = np.maximum((high - low) / 254, 1e-12)
+        data = np.round((matrix - offset) / scale).astype(np.int8)
+        return cls(data, scale.astype(np.float32), offset.astype(np.float32))
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __getitem__(self, rows):
+        return TemplateMatrix(self.data[rows], self.scale, self.offset)
+    
+    @property
+    def shape(self):
+        return self.data.shape
+    
+    @property
+    def nbytes(self):
+        extra = 0 if self.scale is None else self.scale.nbytes + self.offset.nbytes
+        return self.data.nbytes + extra
+    
+    def columns(self, columns):
+        """Contiguous copy of a subset of the columns"""
+        if self.scale is None:
+            return TemplateMatrix(np.ascontiguousarray(self.data[:, columns]))
+        return TemplateMatrix(np.ascontiguousarray(self.data[:, columns]),
+                              self.scale[columns], self.offset[columns])
+    
+    def dequantize(self):
+        """The rows as float32 (no copy for the float32 layout)"""
+        if self.scale is None:
+            return self.data.astype(np.float32, copy=False)
+        return self.data * self.scale + self.offset
+    
+    def differences(self, queries):
+        """Row minus query differences as float32, broadcasting like data - queries"""
+        if self.scale is None:
+            # float16 is promoted to float32 by the subtraction itself
+            return self.data - queries
+        # Move the query into the int8 domain instead of dequantizing every row
+        diff = self.data - (queries - self.offset) / self.scale
+        diff *= self.scale
+        return diff
+
+def squared_distances(matrix, query):
+    """Squared Euclidean distance from every row of matrix to query"""
+    if isinstance(matrix, TemplateMatrix):
+        diff = matrix.differences(query)
+    else:
+        diff = matrix - query
+    return np.einsum('ij,ij->i', diff, diff)
+
+def python_nbytes(value):
+    """Approximate memory held by nested dicts, lists and tuples of numbers, strings and arrays"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(python_nbytes(key) + python_nbytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return size + sum(python_nbytes(item) for item in value)
+    return size
+
+def pairwise_squared_distances(queries, matrix):
+    """(F, N) squared distances between (F, D) queries and the rows of a TemplateMatrix"""
+    diff = matrix[None, :].differences(queries[:, None, :])
+    return np.einsum('fnd,fnd->fn', diff, diff)
+
+def extract_features(landmarks):
+    """Map (..., 21, 3) landmarks to a wrist-relative, scale-normalized descriptor"""
+    points = np.asarray(landmarks, dtype=np.float32)[..., :2]
+    # Image-plane position of every landmark relative to the wrist; the
+    # wrist itself is always zero and the MediaPipe depth is too noisy to keep
+    relative = points[..., 1:, :] - points[..., WRIST:WRIST + 1, :]
+    # Palm length (wrist to middle finger knuckle) as the unit of distance
+    palm = np.linalg.norm(points[..., MIDDLE_FINGER_MCP, :] - points[..., WRIST, :], axis=-1)
+    relative /= np.maximum(palm, 1e-6)[..., None, None]
+    # Explicit feature size so an empty batch keeps its shape
+    return relative.reshape(relative.shape[:-2] + (relative.shape[-2] * relative.shape[-1],))
+
+class StreamingDTW:
+    """Subsequence DTW of one template against a live frame stream"""
+    
+    def __init__(self, template):
+        # (M, features) template sequence
+        self.template = template
+        self.reset()
+    
+    def reset(self):
+        """Forget the stream seen so far"""
+        self.costs = np.full(len(self.template), np.inf)
+        # Per-frame cost returned by the last update
+        self.score = float('inf')
+    
+    def update(self, frame):
+        """Advance by one frame in O(M); returns the per-frame cost of the best match ending now"""
+        local = squared_distances(self.template, frame)
+        # D[t, j] = local[j] + min(D[t-1, j], D[t-1, j-1], D[t, j-1]), where a
+        # match may start at any frame (D[t-1, -1] = 0). Unrolling the D[t, j-1]
+        # term gives D[t, j] = C[j] + min over i <= j of (a[i] - C[i-1]), with
+        # C the cumulative local cost and a the best predecessor from frame t-1
+        previous = np.empty_like(self.costs)
+        previous[0] = 0.0
+        previous[1:] = np.minimum(self.costs[1:], self.costs[:-1])
+        cumulative = np.cumsum(local)
+        shifted = np.concatenate(([0.0], cumulative[:-1]))
+        self.costs = cumulative + np.minimum.accumulate(previous - shifted)
+        self.score = float(self.costs[-1] / len(self.template))
+        return self.score
 
 class GestureRecognizer:
-    def __init__(self):
+    # Default match thresholds per feature space
+    THRESHOLDS = {"raw": 0.1, "invariant": 1.0}
+    # Upper bound on temporary array elements per recognize_batch chunk
+    BATCH_ELEMENTS = 1 << 22
+    # Recent frames kept to prime the DTW matchers of newly added dynamic gestures
+    BUFFER_FRAMES = 90
+    # Everything compile_templates produces; swapped in together under the lock
+    COMPILED_STATE = (
+        'gesture_data', '_sample_blocks', '_dynamic_matchers', '_hand_streams',
+        'gesture_names', 'templates', 'centroids', 'prototypes', 'sample_counts', 'spreads',
+        'template_labels', 'gesture_offsets', 'prototype_labels', 'index',
+        '_cascade_columns', '_cascade_parts', 'classifier',
+        '_cached_landmarks', '_cached_result', '_hand_cache'
+    )
+    
+    def __init__(self, mode="average", k=5, use_prototypes=True, features="raw", threshold=None,
+                 cascade=False, dynamic_threshold=0.1, motion_epsilon=0.002, recheck=True,
+                 backend="template", model_path=None, min_probability=0.8, template_dtype="float32"):
+        # Matching mode: "average" scores each gesture by its mean distance
+        # over all samples, "knn" votes among the k nearest samples
+        self.mode = mode
+        self.k = k
+        # Backend: "template" matching as configured by mode, or a trained
+        # "classifier" whose weights are persisted at model_path
+        self.backend = backend
+        self.model_path = model_path
+        self.min_probability = min_probability
+        self.classifier = None
+        # Match against the condensed prototypes instead of every raw sample
+        self.use_prototypes = use_prototypes
+        # Feature space: "raw" image coordinates or the "invariant" descriptor
+        self.features = features
+        self.threshold = threshold if threshold is not None else self.THRESHOLDS[features]
+        # Bound every gesture on the wrist and fingertips first and only
+        # compute the full distance for gestures that can still win
+        self.cascade = cascade
+        # Storage layout of the compiled templates: "float32", "float16" or "int8"
+        self.template_dtype = template_dtype
+        # Template rows and gestures skipped by the cascade on the last frame
+        self.pruned = {'gestures': 0, 'samples': 0}
+        # Dynamic gestures are matched on raw coordinates (the motion is the
+        # gesture) by one streaming DTW matcher per gesture
+        self.dynamic_threshold = dynamic_threshold
+        self.frame_buffer = deque(maxlen=self.BUFFER_FRAMES)
+        self._dynamic_matchers = {}
+        # Tracked hands get their own matchers, motion cache and action cooldown
+        self._hand_streams = {}
+        self._hand_cache = {}
+        # Reuse the last result while no landmark coordinate has moved more
+        # than motion_epsilon since it was computed (0 disables the cache);
+        # recheck re-scores only the previous winner before reusing it
+        self.motion_epsilon = motion_epsilon
+        self.recheck = recheck
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cached_landmarks = None
+        self._cached_result = None
+        
+        # Held by recognition while it reads the compiled state, and by
+        # compile_templates while it swaps in a new one
+        self._lock = RLock()
+        
         # Store the gesture data
         self.gesture_data = {}
-        # For preventing rapid-fire actions
-        self.last_action_time = 0
-        
+        # Compiled templates per gesture (in the configured feature space),
+        # reused while the gesture's samples are unchanged
+        self._sample_blocks = {}
+        self.compile_templates()
+        # For preventing rapid-fire actions, per hand (None when hands are not tracked)
+        self.last_action_times = {}
+        # Seconds before the same hand may trigger another action
+        self.action_cooldown = 1.0
+    
     def set_gesture_data(self, gesture_data):
         """Set the gesture data to use for recognition"""
-        self.gesture_data = gesture_data
+        self.compile_templates(gesture_data)
+    
+    def invalidate_cache(self):
+        """Drop the compiled templates, e.g. after editing samples in place"""
+        self._sample_blocks = {}
+        self.compile_templates()
+    
+    def encode(self, landmarks):
+        """Turn landmarks of shape (..., 21, 3) into match vectors"""
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if self.features == "invariant":
+            return extract_features(landmarks)
+        return landmarks.reshape(landmarks.shape[:-2] + (landmarks.shape[-2] * landmarks.shape[-1],))
+    
+    def compile_templates(self, gesture_data=None):
+        """Pack every stored sample into one contiguous template matrix"""
+        # Build on a copy and swap the result in under the lock, so a recognition
+        # thread never pairs the names of one library with the templates of another
+        staged = copy.copy(self)
+        if gesture_data is not None:
+            staged.gesture_data = gesture_data
+        staged._build_templates()
+        with self._lock:
+            for name in self.COMPILED_STATE:
+                setattr(self, name, getattr(staged, name))
+    
+    def _build_templates(self):
+        names = []
+        entries = []
+        blocks = []
+        sample_blocks = {}
+        dynamic_matchers = {}
+        for name, data in list(self.gesture_data.items()):
+            samples = data['samples']
+            if len(samples) == 0:
+                continue
+            
+            if data.get('type', 'static') == 'dynamic':
+                dynamic_matchers[name] = self._compile_dynamic(name, samples)
+                continue
+            
+            # Only convert gestures that were added or re-recorded since the last compile
+            prototypes = data.get('prototypes')
+            cached = self._sample_blocks.get(name)
+            if (cached is not None and cached['samples'] is samples
+                    and cached['source'] is prototypes and cached['rows'] == len(samples)):
+                entry = cached
+                # Quantized layouts cache only the condensed prototypes, the rows are re-encoded
+                block = entry['block'] if 'block' in entry else self.encode(samples)
+            else:
+                entry, block = self._compile_gesture(samples, prototypes)
+            sample_blocks[name] = entry
+            
+            names.append(name)
+            entries.append(entry)
+            blocks.append(block.reshape(len(samples), -1))
+        
+        self._sample_blocks = sample_blocks
+        self._dynamic_matchers = dynamic_matchers
+        self._hand_streams = {}
+        self.gesture_names = names
+        if entries:
+            # One row per sample, one column per feature (21 * 3 raw coordinates)
+            templates = np.concatenate(blocks)
+            self.sample_counts = np.array([len(block) for block in blocks])
+            centroids = np.stack([entry['centroid'] for entry in entries])
+            self.spreads = np.array([entry['spread'] for entry in entries], dtype=np.float32)
+            prototypes = np.concatenate([entry['medoids'] for entry in entries])
+            prototype_counts = np.array([len(entry['medoids']) for entry in entries])
+        else:
+            templates = centroids = prototypes = np.empty((0, 0), dtype=np.float32)
+            self.sample_counts = np.empty(0, dtype=np.int64)
+            self.spreads = np.empty(0, dtype=np.float32)
+            prototype_counts = np.empty(0, dtype=np.int64)
+        
+        self.templates = TemplateMatrix.from_array(templates, self.template_dtype)
+        self.centroids = TemplateMatrix.from_array(centroids, self.template_dtype)
+        self.prototypes = TemplateMatrix.from_array(prototypes, self.template_dtype)
+        
+        # Label index: gesture of each row and the first row of each gesture
+        self.template_labels = np.repeat(np.arange(len(names)), self.sample_counts)
+        self.gesture_offsets = np.concatenate(([0], np.cumsum(self.sample_counts)[:-1])).astype(np.int64)
+        self.prototype_labels = np.repeat(np.arange(len(names)), prototype_counts)
+        
+        self.build_index()
+        self.build_cascade()
+        self.build_classifier()
+        
+        # Results computed against the old templates are stale
+        self._cached_landmarks = None
+        self._cached_result = None
+        self._hand_cache = {}
+    
+    def _compile_gesture(self, samples, prototypes):
+        """Encode one gesture's samples and prototypes; returns the cache entry and the template rows"""
+        block = np.ascontiguousarray(self.encode(samples))
+        source = prototypes
+        if self.features != "raw" or prototypes is None:
+            # Stored prototypes live in raw coordinates (or the library
+            # predates condensation), condense in the feature space instead
+            prototypes = condense_samples(block)
+        entry = {
+            'samples': samples,
+            'source': source,
+            'rows': len(samples),
+            'centroid': np.asarray(prototypes['centroid'], dtype=np.float32).reshape(-1),
+            'spread': prototypes['spread'],
+            'medoids': np.asarray(prototypes['medoids'], dtype=np.float32).reshape(len(prototypes['medoids']), -1)
+        }
+        if self.template_dtype == "float32":
+            # A float32 copy of the rows would undo the savings of the quantized layouts
+            entry['block'] = block
+        return entry, block
+    
+    def _compile_dynamic(self, name, samples):
+        """Reuse or build the streaming matcher for one dynamic gesture"""
+        cached = self._dynamic_matchers.get(name)
+        if cached is not None and cached[0] is samples and len(cached[1].template) == len(samples):
+            return cached
+        
+        template = np.asarray(samples, dtype=np.float32).reshape(len(samples), -1)
+        matcher = StreamingDTW(template)
+        # Catch up on the recent stream so a new gesture is live immediately
+        for frame in list(self.frame_buffer):
+            matcher.update(frame)
+        return samples, matcher
+    
+    def template_nbytes(self):
+        """Memory held by the compiled template matrices"""
+        with self._lock:
+            return self.templates.nbytes + self.centroids.nbytes + self.prototypes.nbytes
+    
+    def memory_nbytes(self):
+        """Memory retained for matching, by part; 'library' is the gesture data as loaded"""
+        with self._lock:
+            cascade = sum(part.nbytes for parts in self._cascade_parts.values() for part in parts)
+            index = self.index.data.nbytes + self.index.indices.nbytes if self.index is not None else 0
+            cache = sum(python_nbytes({key: value for key, value in entry.items() if key not in ('samples', 'source')})
+                        for entry in self._sample_blocks.values())
+            dynamic = sum(matcher.template.nbytes + matcher.costs.nbytes for _, matcher in self._dynamic_matchers.values())
+            return {
+                'templates': self.templates.nbytes + self.centroids.nbytes + self.prototypes.nbytes,
+                'cascade': cascade,
+                'index': index,
+                'cache': cache,
+                'dynamic': dynamic,
+                'library': python_nbytes(self.gesture_data)
+            }
+    
+    def quantization_report(self):
+        """Accuracy and memory of the configured template layout against float32"""
+        reference = copy.copy(self)
+        reference._lock = RLock()
+        reference.template_dtype = "float32"
+        reference.model_path = None
+        reference.motion_epsilon = 0
+        reference._sample_blocks = {}
+        reference.compile_templates()
+        
+        # Score every stored static sample with both layouts
+        with self._lock:
+            frames = []
+            labels = []
+            for name in self.gesture_names:
+                samples = self.gesture_data[name]['samples']
+                frames.extend(samples)
+                labels.extend([name] * len(samples))
+            frames = np.asarray(frames, dtype=np.float32)
+            labels = np.array(labels, dtype=object)
+            matches, scores, _ = self._recognize_batch(frames)
+        
+        reference_matches, reference_scores, _ = reference.recognize_batch(frames)
+        # The gesture data itself is shared with the caller, so it is reported separately
+        memory = self.memory_nbytes()
+        reference_memory = reference.memory_nbytes()
+        library_bytes = memory.pop('library')
+        reference_memory.pop('library')
+        return {
+            'dtype': self.template_dtype,
+            'template_bytes': self.template_nbytes(),
+            'float32_bytes': reference.template_nbytes(),
+            'retained_bytes': sum(memory.values()),
+            'float32_retained_bytes': sum(reference_memory.values()),
+            'library_bytes': library_bytes,
+            'accuracy': float(np.mean(matches == labels)) if len(labels) else 0.0,
+            'float32_accuracy': float(np.mean(reference_matches == labels)) if len(labels) else 0.0,
+            'agreement': float(np.mean(matches == reference_matches)) if len(labels) else 1.0,
+            'max_score_error': float(np.abs(scores - reference_scores).max()) if len(labels) else 0.0
+        }
+    
+    def _knn_points(self):
+        """Rows and labels searched by the knn mode"""
+        if self.use_prototypes:
+            return self.prototypes, self.prototype_labels
+        return self.templates, self.template_labels
+    
+    def build_index(self):
+        """Build the nearest-neighbour index used by the knn mode"""
+        self.index = None
+        points, _ = self._knn_points()
+        if self.mode != "knn" or len(points) == 0:
+            return
+        try:
+            # Imported here: scipy is slow to load and only the knn mode needs it
+            from scipy.spatial import cKDTree
+        except ImportError:
+            # scipy is optional; the knn mode falls back to a brute-force search
+            return
+        self.index = cKDTree(points.dequantize())
+    
+    def keypoint_columns(self):
+        """Columns of the match vector that belong to the wrist and fingertips"""
+        if self.features == "invariant":
+            # The descriptor drops the wrist and keeps (x, y) per landmark
+            return np.array([2 * (i - 1) + c for i in FINGERTIPS for c in range(2)])
+        return np.array([3 * i + c for i in [WRIST] + FINGERTIPS for c in range(3)])
+    
+    def build_cascade(self):
+        """Split the template matrices into keypoint and remaining columns"""
+        self._cascade_parts = {}
+        self._cascade_columns = None
+        if not self.cascade or not self.gesture_names:
+            return
+        key_columns = self.keypoint_columns()
+        rest_columns = np.setdiff1d(np.arange(self.templates.shape[1]), key_columns)
+        self._cascade_columns = (key_columns, rest_columns)
+        for name in ('templates', 'centroids', 'prototypes'):
+            matrix = getattr(self, name)
+            self._cascade_parts[name] = (matrix.columns(key_columns), matrix.columns(rest_columns))
+    
+    def build_classifier(self):
+        """Reload the persisted classifier if it matches the library, else retrain it"""
+        self.classifier = None
+        if self.backend != "classifier" or not self.gesture_names:
+            return
+        
+        templates = self.templates.dequantize()
+        fingerprint = library_hash(self.gesture_names, templates, self.template_labels, self.features)
+        if self.model_path:
+            try:
+                model = SoftmaxClassifier.load(self.model_path)
+                if model is not None and model.library_hash == fingerprint:
+                    self.classifier = model
+                    return
+            except Exception as e:
+                print(f"Error loading gesture model: {str(e)}")
+        
+        model = SoftmaxClassifier().fit(templates, self.template_labels, len(self.gesture_names))
+        model.library_hash = fingerprint
+        self.classifier = model
+        if self.model_path:
+            try:
+                model.save(self.model_path)
+            except Exception as e:
+                print(f"Error saving gesture model: {str(e)}")
     
     def recognize(self, landmarks):
         """Compare current hand landmarks with saved gestures"""
-        if not self.gesture_data:
+        with self._lock:
+            return self._recognize(landmarks)
+    
+    def _recognize(self, landmarks):
+        if not self.gesture_names:
             return None, 0, 0
         
-        best_match = None
-        best_score = float('inf')
+        points = np.asarray(landmarks, dtype=np.float32)
+        cached = self._reuse_cached(points, self._cached_landmarks, self._cached_result)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        self.cache_misses += 1
         
-        # Compare with each saved gesture
-        for name, data in self.gesture_data.items():
-            samples = data['samples']
-            
-            # Calculate minimum distance to any sample
-            sample_scores = []
-            for sample in samples:
-                # Calculate Euclidean distance between landmarks
-                total_distance = 0
-                for i in range(min(len(landmarks), len(sample))):
-                    dist = sum((a - b) ** 2 for a, b in zip(landmarks[i], sample[i]))
-                    total_distance += dist
-                
-                sample_scores.append(total_distance)
-            
-            # Get average score across samples
-            avg_score = sum(sample_scores) / len(sample_scores)
+        query = self.encode(points)
+        
+        if self.backend == "classifier":
+            best_indices, scores, confidences = self._classify(query[None])
+            best_index = int(best_indices[0])
+            best_score = float(scores[0])
+            confidence = int(confidences[0])
+            if best_score < self.threshold and confidence >= 100 * self.min_probability:
+                result = self.gesture_names[best_index], best_score, confidence
+            else:
+                result = None, best_score, confidence
             
-            if avg_score < best_score:
-                best_score = avg_score
-                best_match = name
+            self._cached_landmarks = points.copy()
+            self._cached_result = result
+            return result
+        
+        if self.mode == "knn":
+            best_index, best_score = self._match_knn(query)
+        elif self.cascade:
+            best_index, best_score = self._match_average_cascade(query)
+        else:
+            best_index, best_score = self._match_average(query)
+        result = self._threshold(self.gesture_names[best_index], best_score)
         
+        # A copy: callers may refill the same landmark buffer every frame
+        self._cached_landmarks = points.copy()
+        self._cached_result = result
+        return result
+    
+    def _threshold(self, best_match, best_score):
+        """Apply the match threshold and turn the score into a confidence"""
         # Determine if the match is good enough
-        # This threshold might need tuning based on testing
-        threshold = 0.1
+        threshold = self.threshold
         confidence = max(0, min(100, int(100 * (1 - best_score / threshold))))
         
         if best_score < threshold:
@@ -52,15 +575,368 @@ class GestureRecognizer:
         else:
             return None, best_score, confidence
     
-    def execute_action(self, action_type, action_value):
+    def _reuse_cached(self, points, cached_landmarks, cached_result):
+        """Return the cached result if the hand has not really moved, else None"""
+        if (self.motion_epsilon <= 0 or cached_result is None
+                or points.shape != cached_landmarks.shape
+                or np.abs(points - cached_landmarks).max() > self.motion_epsilon):
+            return None
+        
+        best_match = cached_result[0]
+        if not self.recheck or best_match is None or self.mode != "average" or self.backend != "template":
+            return cached_result
+        
+        # Re-score the previous winner alone; fall back to a full pass if it
+        # no longer clears the threshold
+        index = self.gesture_names.index(best_match)
+        query = self.encode(points)
+        if self.use_prototypes:
+            score = float(squared_distances(self.centroids[index:index + 1], query)[0] + self.spreads[index])
+        else:
+            start = self.gesture_offsets[index]
+            score = float(squared_distances(self.templates[start:start + self.sample_counts[index]], query).mean())
+        
+        result = self._threshold(best_match, score)
+        if result[0] is None:
+            return None
+        return result
+    
+    def recognize_hands(self, landmarks_array, hand_ids):
+        """Recognize several tracked hands at once; returns one (match, score, confidence) per hand"""
+        with self._lock:
+            return self._recognize_hands(landmarks_array, hand_ids)
+    
+    def _recognize_hands(self, landmarks_array, hand_ids):
+        points = np.asarray(landmarks_array, dtype=np.float32).reshape(-1, 21, 3)
+        results = [None] * len(points)
+        
+        # Hands that have not moved reuse their own cached result
+        pending = []
+        for i, hand_id in enumerate(hand_ids):
+            cached = self._hand_cache.get(hand_id)
+            if cached is not None:
+                reused = self._reuse_cached(points[i], *cached)
+                if reused is not None:
+                    self.cache_hits += 1
+                    results[i] = reused
+                    continue
+            pending.append(i)
+        
+        # Everything else goes through the matcher in one batch
+        if pending:
+            self.cache_misses += len(pending)
+            matches, scores, confidences = self._recognize_batch(points[pending])
+            for j, i in enumerate(pending):
+                result = matches[j], float(scores[j]), int(confidences[j])
+                self._hand_cache[hand_ids[i]] = (points[i].copy(), result)
+                results[i] = result
+        return results
+    
+    def recognize_actions(self, landmarks_array, hand_ids, min_confidence=70):
+        """Recognize every tracked hand; returns one (hand ID, match, score, confidence, action) per hand"""
+        results = []
+        with self._lock:
+            matches = self._recognize_hands(landmarks_array, hand_ids)
+            for landmarks, hand_id, (best_match, best_score, confidence) in zip(landmarks_array, hand_ids, matches):
+                # A completed motion takes precedence over the pose in the current frame
+                dynamic_match, dynamic_score, dynamic_confidence = self._recognize_dynamic(landmarks, hand_id)
+                if dynamic_match:
+                    best_match, best_score, confidence = dynamic_match, dynamic_score, dynamic_confidence
+                
+                # The action to execute, only when the match is confident enough
+                action = None
+                if best_match and confidence > min_confidence:
+                    gesture = self.gesture_data[best_match]
+                    action = (gesture['action_type'], gesture['action_value'], hand_id)
+                results.append((hand_id, best_match, best_score, confidence, action))
+        return results
+    
+    def forget_hands(self, hand_ids):
+        """Drop the per-hand state of tracks that have ended"""
+        with self._lock:
+            for hand_id in hand_ids:
+                self._hand_streams.pop(hand_id, None)
+                self._hand_cache.pop(hand_id, None)
+                self.last_action_times.pop(hand_id, None)
+    
+    def recognize_dynamic(self, landmarks, hand_id=None):
+        """Feed one frame to the dynamic gesture matchers, those of one tracked hand if hand_id is given"""
+        with self._lock:
+            return self._recognize_dynamic(landmarks, hand_id)
+    
+    def _recognize_dynamic(self, landmarks, hand_id):
+        frame = np.asarray(landmarks, dtype=np.float32).reshape(-1)
+        if hand_id is None:
+            self.frame_buffer.append(frame)
+            matchers = {name: matcher for name, (_, matcher) in self._dynamic_matchers.items()}
+        else:
+            matchers = self._hand_matchers(hand_id)
+        if not matchers:
+            return None, 0, 0
+        
+        threshold = self.dynamic_threshold
+        best_match = None
+        best_score = float('inf')
+        lowest = float('inf')
+        for name, matcher in matchers.items():
+            previous = matcher.score
+            score = matcher.update(frame)
+            lowest = min(lowest, score)
+            # The cost keeps falling while the motion is being completed; the
+            # match fires once it stops falling, with the score of its lowest point
+            if previous < threshold and score >= previous and previous < best_score:
+                best_score = previous
+                best_match = name
+        
+        if best_match is None:
+            return None, lowest, self._dynamic_confidence(lowest)
+        
+        # The motion is complete; start looking for the next one from scratch
+        if hand_id is None:
+            self.reset_stream()
+        else:
+            for matcher in matchers.values():
+                matcher.reset()
+        return best_match, best_score, self._dynamic_confidence(best_score)
+    
+    def _dynamic_confidence(self, score):
+        return max(0, min(100, int(100 * (1 - score / self.dynamic_threshold))))
+    
+    def _hand_matchers(self, hand_id):
+        """Streaming matchers of one tracked hand, created on its first frame"""
+        matchers = self._hand_streams.get(hand_id)
+        if matchers is None:
+            matchers = {name: StreamingDTW(matcher.template) for name, (_, matcher) in self._dynamic_matchers.items()}
+            self._hand_streams[hand_id] = matchers
+        return matchers
+    
+    def reset_stream(self):
+        """Discard the frame history used by the dynamic matchers"""
+        with self._lock:
+            self.frame_buffer.clear()
+            for _, matcher in self._dynamic_matchers.values():
+                matcher.reset()
+    
+    def recognize_batch(self, landmarks_array, chunk_size=None):
+        """Recognize an (F, 21, 3) array of frames; returns match, score and confidence arrays"""
+        with self._lock:
+            return self._recognize_batch(landmarks_array, chunk_size)
+    
+    def _recognize_batch(self, landmarks_array, chunk_size=None):
+        # An empty list or recording still becomes a (0, 21, 3) batch
+        queries = self.encode(np.asarray(landmarks_array, dtype=np.float32).reshape(-1, 21, 3))
+        n_frames = len(queries)
+        matches = np.full(n_frames, None, dtype=object)
+        scores = np.zeros(n_frames)
+        confidences = np.zeros(n_frames, dtype=np.int64)
+        if not self.gesture_names or n_frames == 0:
+            return matches, scores, confidences
+        
+        if chunk_size is None:
+            # Bound the (chunk, rows, features) difference tensor
+            if self.mode == "knn":
+                rows = len(self._knn_points()[0])
+            else:
+                rows = len(self.centroids) if self.use_prototypes else len(self.templates)
+            chunk_size = max(1, self.BATCH_ELEMENTS // (rows * queries.shape[1]))
+        
+        if self.backend == "classifier":
+            best_indices, scores, confidences = self._classify(queries)
+            accepted = (scores < self.threshold) & (confidences >= 100 * self.min_probability)
+            names = np.array(self.gesture_names, dtype=object)
+            matches[accepted] = names[best_indices[accepted]]
+            return matches, scores, confidences
+        
+        best_indices = np.zeros(n_frames, dtype=np.int64)
+        for start in range(0, n_frames, chunk_size):
+            chunk = queries[start:start + chunk_size]
+            if self.mode == "knn":
+                indices, chunk_scores = self._match_knn_batch(chunk)
+            else:
+                indices, chunk_scores = self._match_average_batch(chunk)
+            best_indices[start:start + chunk_size] = indices
+            scores[start:start + chunk_size] = chunk_scores
+        
+        # Same threshold and confidence rule as recognize
+        confidences = np.clip(np.trunc(100 * (1 - scores / self.threshold)), 0, 100).astype(np.int64)
+        accepted = scores < self.threshold
+        names = np.array(self.gesture_names, dtype=object)
+        matches[accepted] = names[best_indices[accepted]]
+        return matches, scores, confidences
+    
+    def _classify(self, queries):
+        """Classifier prediction for (F, features) queries"""
+        # The class probability is the confidence; the average distance to the
+        # predicted gesture is the score, so poses unlike any gesture are still
+        # rejected by the threshold
+        probabilities = self.classifier.predict_proba(queries)
+        best_indices = np.argmax(probabilities, axis=1)
+        diff = queries - self.centroids[best_indices].dequantize()
+        scores = np.einsum('ij,ij->i', diff, diff) + self.spreads[best_indices]
+        confidences = (100 * probabilities[np.arange(len(queries)), best_indices]).astype(np.int64)
+        return best_indices, scores.astype(np.float64), confidences
+    
+    def _match_average_batch(self, queries):
+        """Batched _match_average over (F, features) queries"""
+        if self.use_prototypes:
+            avg_scores = pairwise_squared_distances(queries, self.centroids) + self.spreads
+        else:
+            sample_scores = pairwise_squared_distances(queries, self.templates)
+            avg_scores = np.add.reduceat(sample_scores, self.gesture_offsets, axis=1) / self.sample_counts
+        
+        best_indices = np.argmin(avg_scores, axis=1)
+        return best_indices, avg_scores[np.arange(len(queries)), best_indices]
+    
+    def _match_knn_batch(self, queries):
+        """Batched _match_knn over (F, features) queries"""
+        points, point_labels = self._knn_points()
+        k = self._knn_k()
+        if self.index is not None:
+            distances, rows = self.index.query(queries, k=k)
+            sample_scores = np.reshape(distances, (len(queries), k)) ** 2
+            rows = np.reshape(rows, (len(queries), k))
+        else:
+            all_scores = pairwise_squared_distances(queries, points)
+            rows = np.argpartition(all_scores, k - 1, axis=1)[:, :k]
+            sample_scores = np.take_along_axis(all_scores, rows, axis=1)
+        return self._vote(point_labels[rows], sample_scores)
+    
+    def _match_average(self, query):
+        """Pick the gesture with the lowest average distance over its samples"""
+        if self.use_prototypes:
+            # Mean distance to the samples = distance to the centroid + spread
+            avg_scores = squared_distances(self.centroids, query) + self.spreads
+        else:
+            # Squared Euclidean distance to every sample in a single pass
+            sample_scores = squared_distances(self.templates, query)
+            
+            # Average score across the samples of each gesture
+            avg_scores = np.add.reduceat(sample_scores, self.gesture_offsets) / self.sample_counts
+        
+        best_index = int(np.argmin(avg_scores))
+        return best_index, float(avg_scores[best_index])
+    
+    def _match_average_cascade(self, query):
+        """Same result as _match_average, skipping gestures that cannot win"""
+        key_columns, rest_columns = self._cascade_columns
+        query_key = query[key_columns]
+        query_rest = query[rest_columns]
+        
+        if self.use_prototypes:
+            key_part, rest_part = self._cascade_parts['centroids']
+            lower = squared_distances(key_part, query_key) + self.spreads
+            
+            def full_scores(gestures):
+                return lower[gestures] + squared_distances(rest_part[gestures], query_rest)
+            
+            rows_per_gesture = np.ones(len(self.gesture_names), dtype=np.int64)
+        else:
+            key_part, rest_part = self._cascade_parts['templates']
+            partial = squared_distances(key_part, query_key)
+            lower = np.add.reduceat(partial, self.gesture_offsets) / self.sample_counts
+            
+            def full_scores(gestures):
+                rows = np.flatnonzero(np.isin(self.template_labels, gestures))
+                scores = partial[rows] + squared_distances(rest_part[rows], query_rest)
+                totals = np.bincount(self.template_labels[rows], weights=scores,
+                                     minlength=len(self.gesture_names))
+                return totals[gestures] / self.sample_counts[gestures]
+            
+            rows_per_gesture = self.sample_counts
+        
+        # The gesture with the lowest bound gives a first best score; any
+        # gesture whose bound already exceeds it (and so also any gesture over
+        # the threshold once a match is found) is dropped without a full pass
+        first = int(np.argmin(lower))
+        bound = full_scores(np.array([first]))[0]
+        survivors = np.flatnonzero(lower <= bound)
+        avg_scores = full_scores(survivors)
+        
+        pruned = np.ones(len(self.gesture_names), dtype=bool)
+        pruned[survivors] = False
+        self.pruned = {'gestures': int(pruned.sum()), 'samples': int(rows_per_gesture[pruned].sum())}
+        
+        best = int(np.argmin(avg_scores))
+        return int(survivors[best]), float(avg_scores[best])
+    
+    def _knn_k(self):
+        """Number of neighbours to vote with for the current template rows"""
+        points, _ = self._knn_points()
+        k = self.k
+        if self.use_prototypes:
+            # Each prototype stands in for several samples, shrink k to match
+            k = max(1, int(round(k * len(points) / len(self.templates))))
+        return min(k, len(points))
+    
+    def _match_knn(self, query):
+        """Vote among the k nearest samples, breaking ties by mean distance"""
+        points, point_labels = self._knn_points()
+        k = self._knn_k()
+        if self.index is not None:
+            distances, rows = self.index.query(query, k=k)
+            sample_scores = np.atleast_1d(distances) ** 2
+            rows = np.atleast_1d(rows)
+        elif self.cascade:
+            rows, sample_scores = self._nearest_cascade(query, k)
+        else:
+            # No index available, fall back to a partial sort over all samples
+            all_scores = squared_distances(points, query)
+            rows = np.argpartition(all_scores, k - 1)[:k]
+            sample_scores = all_scores[rows]
+        
+        best_indices, best_scores = self._vote(point_labels[rows][None], sample_scores[None])
+        return int(best_indices[0]), float(best_scores[0])
+    
+    def _vote(self, labels, scores):
+        """Per-row vote over (F, k) neighbour labels and distances"""
+        n_gestures = len(self.gesture_names)
+        flat = (labels + np.arange(len(labels))[:, None] * n_gestures).ravel()
+        votes = np.bincount(flat, minlength=len(labels) * n_gestures).reshape(len(labels), n_gestures)
+        totals = np.bincount(flat, weights=np.ravel(scores),
+                             minlength=len(labels) * n_gestures).reshape(len(labels), n_gestures)
+        
+        # Most votes wins; among equal votes the closer neighbours win
+        mean_scores = np.full(votes.shape, np.inf)
+        leaders = votes == votes.max(axis=1, keepdims=True)
+        mean_scores[leaders] = totals[leaders] / votes[leaders]
+        best_indices = np.argmin(mean_scores, axis=1)
+        return best_indices, mean_scores[np.arange(len(labels)), best_indices]
+    
+    def _nearest_cascade(self, query, k):
+        """Exact k nearest rows, computing full distances only for candidates"""
+        key_columns, rest_columns = self._cascade_columns
+        query_key = query[key_columns]
+        query_rest = query[rest_columns]
+        key_part, rest_part = self._cascade_parts['prototypes' if self.use_prototypes else 'templates']
+        _, point_labels = self._knn_points()
+        
+        # The k rows closest on the keypoints bound the k-th full distance;
+        # rows whose keypoint distance alone exceeds that bound cannot qualify
+        partial = squared_distances(key_part, query_key)
+        seed = np.argpartition(partial, k - 1)[:k]
+        bound = (partial[seed] + squared_distances(rest_part[seed], query_rest)).max()
+        candidates = np.flatnonzero(partial <= bound)
+        scores = partial[candidates] + squared_distances(rest_part[candidates], query_rest)
+        
+        kept = np.zeros(len(self.gesture_names), dtype=bool)
+        kept[point_labels[candidates]] = True
+        self.pruned = {'gestures': int((~kept).sum()), 'samples': len(partial) - len(candidates)}
+        
+        nearest = np.argpartition(scores, k - 1)[:k]
+        return candidates[nearest], scores[nearest]
+    
+    def execute_action(self, action_type, action_value, hand_id=None):
         """Execute the associated action for a recognized gesture"""
         try:
-            # Add a cooldown to prevent rapid-fire actions
+            # Imported on first use: pyautogui is slow to load and only needed once actions fire
+            import pyautogui
+            
+            # Add a cooldown to prevent rapid-fire actions; each hand has its own
             current_time = time.time()
-            if current_time - self.last_action_time < 1.0:
+            if current_time - self.last_action_times.get(hand_id, 0) < self.action_cooldown:
                 return
             
-            self.last_action_time = current_time
+            self.last_action_times[hand_id] = current_time
             
             if action_type == "keyboard":
                 pyautogui.press(action_value)
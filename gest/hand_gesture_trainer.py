@@ -1,14 +1,21 @@
 import os
 import pickle
+from threading import Thread, Lock
 import cv2
-import mediapipe as mp
 import numpy as np
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
-from threading import Thread
-import time
-from gesture_recognizer import GestureRecognizer
+from gesture_recognizer import GestureRecognizer, condense_samples
+from frame_grabber import LatestFrameGrabber
+from video_pipeline import VideoPipeline
+from inference_pool import HandInferencePool
+from roi_tracker import HandROITracker
+from frame_scheduler import FrameRateScheduler
+from frame_buffers import FrameBufferPool
+from frame_sources import open_frame_source
+from landmark_log import LandmarkRecorder
+from hand_tracker import HandTracker, training_sample
+from tk_renderer import TkRenderer, VideoSurface
 
 class HandGestureTrainer:
     def __init__(self, root):
@@ -17,40 +24,110 @@ class HandGestureTrainer:
         self.root.geometry("1200x700")
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
-        # MediaPipe setup
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=1,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        self.mp_drawing = mp.solutions.drawing_utils
-        
-        # Camera setup
+        # MediaPipe is imported and its graph built on a background thread once the
+        # window is up (see load_model); starting the camera waits for it
+        self.mp_hands = None
+        self.hands = None
+        self.roi_hands = None
+        self.mp_drawing = None
+        self.landmark_pb2 = None
+        self.landmark_style = None
+        self.model_thread = None
+        self.model_error = None
+        # Stable IDs for every hand in view
+        self.hand_tracker = HandTracker()
+        
+        # Camera setup; the source may also be a video file, an image directory or "synthetic"
+        self.frame_source = 0
+        # Non-realtime sources run as fast as possible and process every frame
+        self.realtime_source = True
         self.cap = None
+        self.grabber = None
         self.camera_active = False
-        self.thread = None
-        self.stop_thread = False
+        self.pipeline = None
+        # Back-pressure between pipeline stages: "drop_oldest" keeps latency
+        # low, "block" processes every frame at the pace of the slowest stage
+        self.pipeline_policy = "drop_oldest"
+        self.pipeline_queue_size = 2
+        # Worker processes for hand-landmark inference; 0 runs it in this process
+        self.inference_workers = 0
+        self.inference_pool = None
+        # In-process inference runs on a downscaled frame, or on a crop around the tracked hand
+        self.roi_tracker = HandROITracker(self.run_hands, inference_scale=0.5, track_roi=True, max_hands=2,
+                                          detect_roi=self.run_roi_hands)
+        # Full rate while a hand is in view, idle rate after two seconds without one
+        self.scheduler = FrameRateScheduler(target_fps=30, idle_fps=5, idle_after=60)
+        # Mirrored RGB frames live in recycled buffers from capture to display
+        self.frame_buffers = FrameBufferPool()
+        # Frames are shown from the Tk main thread, newest first, at most display_fps times a second
+        self.display_fps = 30
+        self.renderer = TkRenderer(self.root, self.display_frame, fps=self.display_fps, on_discard=self.release_frame)
+        # Surface showing the video, None while no view is visible; kept up to date by Tk events
+        # so the pipeline threads can read it without touching widgets
+        self.visible_surface = None
+        self.window_mapped = True
+        # Called once, on the main thread, when the first processed frame has been shown
+        self.on_first_frame = None
         
         # Training data
         self.gesture_data = {}
+        # Guards the recording and testing state shared by the Tk and pipeline threads
+        self.state_lock = Lock()
         self.current_samples = []
         self.is_recording = False
         self.current_gesture_name = ""
         self.current_action_type = "keyboard"
         self.current_action_value = ""
+        self.current_gesture_type = "static"
         self.sample_count = 0
         self.required_samples = 30
         
-        # Create recognizer object
-        self.recognizer = GestureRecognizer()
+        # Create recognizer object; the classifier backend keeps its weights next to the library
+        self.recognizer = GestureRecognizer(model_path='gestures/gestures_model.npz')
         
         # Load existing gestures if available
         self.load_gestures()
         
         # Create UI
         self.setup_ui()
+        
+        self.root.after_idle(self.start_model_loading)
+    
+    def start_model_loading(self):
+        if self.model_thread is None:
+            self.model_thread = Thread(target=self.load_model, name="model-loader")
+            self.model_thread.daemon = True
+            self.model_thread.start()
+    
+    def load_model(self):
+        """Import MediaPipe and build the Hands graph; runs on the model-loader thread"""
+        try:
+            import mediapipe as mp
+            from mediapipe.framework.formats import landmark_pb2
+            
+            self.mp_hands = mp.solutions.hands
+            self.mp_drawing = mp.solutions.drawing_utils
+            self.landmark_pb2 = landmark_pb2
+            # Frames are drawn in RGB, so the default red landmark colour is given as RGB
+            self.landmark_style = self.mp_drawing.DrawingSpec(color=(255, 0, 0))
+            # One graph for full frames and one for hand crops: each tracks within one image geometry
+            self.hands, self.roi_hands = [self.mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7
+            ) for _ in range(2)]
+        except Exception as e:
+            self.model_error = e
+    
+    def wait_for_model(self):
+        """Block until MediaPipe is ready; False if it could not be loaded"""
+        self.start_model_loading()
+        self.model_thread.join()
+        if self.model_error is not None:
+            messagebox.showerror("Error", f"Could not load the hand tracking model: {str(self.model_error)}")
+            return False
+        return True
     
     def setup_ui(self):
         # Main frame setup with tabs
@@ -74,6 +151,26 @@ class HandGestureTrainer:
         self.setup_training_tab()
         self.setup_testing_tab()
         self.setup_management_tab()
+        
+        # Track which video view is visible instead of asking Tk for every frame
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.update_visibility())
+        self.root.bind("<Map>", self.on_window_map)
+        self.root.bind("<Unmap>", self.on_window_map)
+        self.update_visibility()
+    
+    def on_window_map(self, event):
+        # Child widgets inherit the root's bindings; only the window itself matters
+        if event.widget is self.root:
+            self.window_mapped = event.type == tk.EventType.Map
+            self.update_visibility()
+    
+    def update_visibility(self):
+        """Recompute which video surface is on screen"""
+        surfaces = {0: self.video_surface, 1: self.test_video_surface}
+        visible = None
+        if self.window_mapped:
+            visible = surfaces.get(self.notebook.index(self.notebook.select()))
+        self.visible_surface = visible
     
     def setup_training_tab(self):
         main_frame = ttk.Frame(self.training_tab)
@@ -89,6 +186,7 @@ class HandGestureTrainer:
         # Video display
         self.video_label = ttk.Label(left_frame)
         self.video_label.pack(fill="both", expand=True, padx=5, pady=5)
+        self.video_surface = VideoSurface(self.video_label)
         
         # Control panel
         control_frame = ttk.LabelFrame(right_frame, text="Training Controls")
@@ -112,14 +210,20 @@ class HandGestureTrainer:
         self.action_value_info = ttk.Label(control_frame, text="Keyboard: key name (e.g., 'space', 'a')\nMouse: button name (e.g., 'left', 'right')")
         self.action_value_info.grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=5)
         
+        # Gesture type selection: a held pose or a motion over time
+        ttk.Label(control_frame, text="Gesture Type:").grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.gesture_type_combo = ttk.Combobox(control_frame, values=["static", "dynamic"], state="readonly")
+        self.gesture_type_combo.current(0)
+        self.gesture_type_combo.grid(row=4, column=1, padx=5, pady=5)
+        
         # Sample count
-        ttk.Label(control_frame, text="Required Samples:").grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        ttk.Label(control_frame, text="Required Samples:").grid(row=5, column=0, sticky="w", padx=5, pady=5)
         self.sample_count_var = tk.StringVar(value=f"0/{self.required_samples}")
-        ttk.Label(control_frame, textvariable=self.sample_count_var).grid(row=4, column=1, sticky="w", padx=5, pady=5)
+        ttk.Label(control_frame, textvariable=self.sample_count_var).grid(row=5, column=1, sticky="w", padx=5, pady=5)
         
         # Buttons frame
         buttons_frame = ttk.Frame(control_frame)
-        buttons_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        buttons_frame.grid(row=6, column=0, columnspan=2, pady=10)
         
         # Camera control button
         self.camera_button = ttk.Button(buttons_frame, text="Start Camera", command=self.toggle_camera)
@@ -135,7 +239,7 @@ class HandGestureTrainer:
         
         # Status message
         self.status_var = tk.StringVar(value="Ready")
-        ttk.Label(control_frame, textvariable=self.status_var, font=("Arial", 10, "italic")).grid(row=6, column=0, columnspan=2, sticky="w", padx=5, pady=10)
+        ttk.Label(control_frame, textvariable=self.status_var, font=("Arial", 10, "italic")).grid(row=7, column=0, columnspan=2, sticky="w", padx=5, pady=10)
     
     def setup_testing_tab(self):
         main_frame = ttk.Frame(self.testing_tab)
@@ -151,6 +255,7 @@ class HandGestureTrainer:
         # Video display for testing
         self.test_video_label = ttk.Label(left_frame)
         self.test_video_label.pack(fill="both", expand=True, padx=5, pady=5)
+        self.test_video_surface = VideoSurface(self.test_video_label)
         
         # Testing controls
         control_frame = ttk.LabelFrame(right_frame, text="Testing Controls")
@@ -161,6 +266,11 @@ class HandGestureTrainer:
         self.test_button = ttk.Button(control_frame, text="Start Testing", command=self.toggle_testing)
         self.test_button.pack(pady=10)
         
+        # Record the landmark stream for MediaPipe-free replay
+        self.landmark_recorder = None
+        self.landmark_record_button = ttk.Button(control_frame, text="Record Landmarks", command=self.toggle_landmark_recording)
+        self.landmark_record_button.pack(pady=5)
+        
         # Recognition info
         self.recognition_frame = ttk.LabelFrame(right_frame, text="Recognition Results")
         self.recognition_frame.pack(fill="x", padx=5, pady=10)
@@ -187,17 +297,19 @@ class HandGestureTrainer:
         list_frame.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         
         # Create treeview for gesture list
-        columns = ("name", "action_type", "action_value", "samples")
+        columns = ("name", "type", "action_type", "action_value", "samples")
         self.gesture_tree = ttk.Treeview(list_frame, columns=columns, show="headings")
         
         # Define headings
         self.gesture_tree.heading("name", text="Gesture Name")
+        self.gesture_tree.heading("type", text="Type")
         self.gesture_tree.heading("action_type", text="Action Type")
         self.gesture_tree.heading("action_value", text="Action Value")
         self.gesture_tree.heading("samples", text="Samples")
         
         # Define columns
         self.gesture_tree.column("name", width=150)
+        self.gesture_tree.column("type", width=70)
         self.gesture_tree.column("action_type", width=100)
         self.gesture_tree.column("action_value", width=100)
         self.gesture_tree.column("samples", width=70)
@@ -223,8 +335,11 @@ class HandGestureTrainer:
     
     def toggle_camera(self):
         if not self.camera_active:
+            if not self.wait_for_model():
+                return
+            
             # Start camera
-            self.cap = cv2.VideoCapture(0)
+            self.cap = open_frame_source(self.frame_source, realtime=self.realtime_source)
             if not self.cap.isOpened():
                 messagebox.showerror("Error", "Could not open camera")
                 return
@@ -233,16 +348,31 @@ class HandGestureTrainer:
             self.camera_button.config(text="Stop Camera")
             self.record_button.config(state="normal")
             
-            # Start video processing thread
-            self.stop_thread = False
-            self.thread = Thread(target=self.process_video)
-            self.thread.daemon = True
-            self.thread.start()
+            # Capture runs on its own thread so processing always gets the newest frame
+            self.grabber = LatestFrameGrabber(self.cap, buffer_pool=self.frame_buffers, mirror=True,
+                                              lossless=not self.realtime_source)
+            self.grabber.start()
+            
+            # Start the video processing pipeline
+            self.renderer.start()
+            self.roi_tracker.reset()
+            self.hand_tracker.reset()
+            self.recognizer.forget_hands(self.hand_tracker.removed)
+            self.scheduler.wake()
+            self.process_video()
         else:
             # Stop camera
-            self.stop_thread = True
-            if self.thread:
-                self.thread.join(timeout=1.0)
+            if self.pipeline:
+                self.pipeline.stop()
+            
+            if self.inference_pool:
+                self.inference_pool.stop()
+                self.inference_pool = None
+            
+            if self.grabber:
+                self.grabber.stop()
+            
+            self.renderer.stop()
             
             if self.cap:
                 self.cap.release()
@@ -254,78 +384,158 @@ class HandGestureTrainer:
             
             # Reset the video display
             blank = np.zeros((480, 640, 3), dtype=np.uint8)
-            self.update_video(blank, self.video_label)
-            self.update_video(blank, self.test_video_label)
+            self.video_surface.show(blank)
+            self.test_video_surface.show(blank)
     
     def process_video(self):
-        while not self.stop_thread and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            # Flip the frame horizontally for a more natural view
-            frame = cv2.flip(frame, 1)
-            
-            # Process with MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-            
-            # Draw hand landmarks
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    self.mp_drawing.draw_landmarks(
-                        frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                    
-                    # Extract hand landmarks for training/testing
-                    landmarks = []
-                    for landmark in hand_landmarks.landmark:
-                        landmarks.append([landmark.x, landmark.y, landmark.z])
-                    
-                    # For recording mode
-                    if self.is_recording and len(self.current_samples) < self.required_samples:
-                        self.current_samples.append(landmarks)
-                        self.sample_count = len(self.current_samples)
-                        self.sample_count_var.set(f"{self.sample_count}/{self.required_samples}")
-                        
-                        if self.sample_count >= self.required_samples:
-                            self.is_recording = False
-                            self.record_button.config(text="Start Recording")
-                            self.save_button.config(state="normal")
-                            self.status_var.set("Samples collected! Ready to save.")
-                    
-                    # For testing mode
-                    if self.testing_active:
-                        self.recognize_gesture(landmarks, frame)
-            
-            # Display status text
-            if self.is_recording:
-                cv2.putText(frame, f"Recording: {self.sample_count}/{self.required_samples}", 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            
-            # Display the resulting frame
-            if self.notebook.index(self.notebook.select()) == 0:  # Training tab
-                self.update_video(frame, self.video_label)
-            elif self.notebook.index(self.notebook.select()) == 1:  # Testing tab
-                self.update_video(frame, self.test_video_label)
-            
-            time.sleep(0.01)  # Small delay to reduce CPU usage
+        """Run capture, inference, analysis, drawing and display as pipelined stages"""
+        self.pipeline = VideoPipeline(self.grabber, queue_size=self.pipeline_queue_size,
+                                      policy=self.pipeline_policy if self.realtime_source else "block",
+                                      scheduler=self.scheduler if self.realtime_source else None,
+                                      on_drop=self.release_frame)
+        if self.inference_workers > 0:
+            self.inference_pool = HandInferencePool(
+                self.inference_workers,
+                on_drop=self.release_frame,
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7
+            )
+            self.pipeline.add_stage("inference", self.detect_hands_pooled)
+        else:
+            self.pipeline.add_stage("inference", self.detect_hands)
+        self.pipeline.add_stage("analysis", self.analyze_frame)
+        self.pipeline.add_stage("drawing", self.draw_frame)
+        # The last stage only hands the frame over; Tk draws it on the main thread
+        self.pipeline.add_stage("display", self.renderer.post)
+        # Actions run off the main line so a slow key press never stalls the video
+        self.dispatch_action = self.pipeline.add_branch("actions", self.run_action)
+        self.pipeline.start()
     
-    def update_video(self, frame, label):
-        # Convert the frame to a format compatible with tkinter
-        img = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(img)
-        img = ImageTk.PhotoImage(image=img)
+    def detect_hands(self, frame):
+        # The grabber already mirrored the frame and converted it to RGB
+        
+        # Process with MediaPipe on the region chosen by the tracker
+        landmarks, handedness = self.roi_tracker.process(frame)
         
-        # Update the label
-        label.configure(image=img)
-        label.image = img  # Keep a reference to prevent garbage collection
+        return {'frame': frame, 'landmarks': landmarks, 'handedness': handedness, 'overlays': [],
+                'inference_size': self.roi_tracker.last_input_size}
+    
+    def run_hands(self, image, hands=None):
+        """MediaPipe landmarks for an RGB image as a (hands, 21, 3) array, plus handedness"""
+        results = (hands or self.hands).process(image)
+        landmarks = [[[lm.x, lm.y, lm.z] for lm in hand.landmark] for hand in results.multi_hand_landmarks or []]
+        handedness = [h.classification[0].label for h in results.multi_handedness or []]
+        return landmarks, handedness
+    
+    def run_roi_hands(self, image):
+        return self.run_hands(image, self.roi_hands)
+    
+    def to_landmark_lists(self, landmarks):
+        """Landmark arrays as MediaPipe landmark lists, for drawing"""
+        landmark_pb2 = self.landmark_pb2
+        return [landmark_pb2.NormalizedLandmarkList(
+                    landmark=[landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in hand.tolist()])
+                for hand in landmarks]
+    
+    def detect_hands_pooled(self, frame):
+        """detect_hands with MediaPipe running in the inference worker processes"""
+        result = self.inference_pool.process(frame)
+        if result is None:
+            return None
+        
+        frame, landmarks, handedness = result
+        return {'frame': frame, 'landmarks': landmarks, 'handedness': handedness, 'overlays': [],
+                'inference_size': (frame.shape[1], frame.shape[0])}
+    
+    def analyze_frame(self, packet):
+        self.scheduler.report(len(packet['landmarks']) > 0)
+        
+        recorder = self.landmark_recorder
+        if recorder is not None:
+            recorder.write(packet['landmarks'])
+        
+        # Stable IDs let every hand keep its own recognition and action state
+        packet['hand_ids'] = self.hand_tracker.update(packet['landmarks'], packet['handedness'])
+        self.recognizer.forget_hands(self.hand_tracker.removed)
+        
+        # For recording mode
+        with self.state_lock:
+            added = len(packet['landmarks']) and self.is_recording and len(self.current_samples) < self.required_samples
+            if added:
+                self.current_samples.append(training_sample(packet['landmarks'], packet['hand_ids']))
+                self.sample_count = len(self.current_samples)
+                if self.sample_count >= self.required_samples:
+                    self.is_recording = False
+            recording, sample_count, testing = self.is_recording, self.sample_count, self.testing_active
+        
+        if added:
+            # Widgets are only touched from the main thread
+            self.renderer.call(self.sample_count_var.set, f"{sample_count}/{self.required_samples}")
+            if sample_count >= self.required_samples:
+                self.renderer.call(self.record_button.config, text="Start Recording")
+                self.renderer.call(self.save_button.config, state="normal")
+                self.renderer.call(self.status_var.set, "Samples collected! Ready to save.")
+        
+        # For testing mode
+        if testing and len(packet['landmarks']):
+            self.recognize_gestures(packet)
+        
+        # Display status text
+        if recording:
+            packet['overlays'].append((f"Recording: {sample_count}/{self.required_samples}", (255, 0, 0)))
+        return packet
+    
+    def draw_frame(self, packet):
+        if self.visible_surface is None:
+            # Nothing shows the video: recognition already ran, so the frame is done
+            self.release_frame(packet)
+            return None
+        frame = packet['frame']
+        
+        # Draw hand landmarks
+        for hand_landmarks in self.to_landmark_lists(packet['landmarks']):
+            self.mp_drawing.draw_landmarks(
+                frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS, self.landmark_style)
+        
+        for line, (text, color) in enumerate(packet['overlays']):
+            cv2.putText(frame, text, (10, 30 + 25 * line), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        
+        # Effective processing rate, lower while idle
+        mode = " (idle)" if self.scheduler.idle else ""
+        cv2.putText(frame, f"{self.scheduler.effective_fps():.0f} fps{mode}", (10, frame.shape[0] - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return packet
+    
+    def display_frame(self, packet):
+        # Display the resulting frame on whichever view is visible now
+        surface = self.visible_surface
+        if surface is not None:
+            surface.show(packet['frame'])
+        self.release_frame(packet)
+        
+        if self.on_first_frame is not None:
+            callback, self.on_first_frame = self.on_first_frame, None
+            callback()
+    
+    def run_action(self, action):
+        action_type, action_value, hand_id = action
+        self.recognizer.execute_action(action_type, action_value, hand_id)
+    
+    def release_frame(self, item):
+        """Return the frame buffer of a finished or discarded packet to the pool"""
+        self.frame_buffers.release(item['frame'] if isinstance(item, dict) else item)
     
     def toggle_recording(self):
-        if not self.is_recording:
+        with self.state_lock:
+            recording = self.is_recording
+        if not recording:
             # Start recording
             self.current_gesture_name = self.gesture_name_entry.get().strip()
             self.current_action_type = self.action_type_combo.get()
             self.current_action_value = self.action_value_entry.get().strip()
+            self.current_gesture_type = self.gesture_type_combo.get()
             
             # Validate inputs
             if not self.current_gesture_name:
@@ -343,35 +553,49 @@ class HandGestureTrainer:
                     return
             
             # Reset samples and start recording
-            self.current_samples = []
-            self.sample_count = 0
-            self.sample_count_var.set(f"{self.sample_count}/{self.required_samples}")
-            self.is_recording = True
+            with self.state_lock:
+                self.current_samples = []
+                self.sample_count = 0
+                self.is_recording = True
+            self.sample_count_var.set(f"0/{self.required_samples}")
+            self.scheduler.wake()
             self.record_button.config(text="Stop Recording")
             self.save_button.config(state="disabled")
-            self.status_var.set("Recording... Hold your gesture steady.")
+            if self.current_gesture_type == "dynamic":
+                # Consecutive frames form the motion's time series
+                self.status_var.set("Recording... Perform the motion once.")
+            else:
+                self.status_var.set("Recording... Hold your gesture steady.")
         else:
             # Stop recording
-            self.is_recording = False
+            with self.state_lock:
+                self.is_recording = False
+                sample_count = self.sample_count
             self.record_button.config(text="Start Recording")
             
-            if self.sample_count > 0:
+            if sample_count > 0:
                 self.save_button.config(state="normal")
-                self.status_var.set(f"Recording stopped. {self.sample_count} samples collected.")
+                self.status_var.set(f"Recording stopped. {sample_count} samples collected.")
             else:
                 self.status_var.set("Recording stopped. No samples collected.")
     
     def save_gesture(self):
-        if len(self.current_samples) == 0:
+        with self.state_lock:
+            samples = list(self.current_samples)
+        if len(samples) == 0:
             messagebox.showerror("Error", "No samples recorded")
             return
         
         # Save the gesture data
-        self.gesture_data[self.current_gesture_name] = {
-            'samples': self.current_samples,
+        gesture = {
+            'type': self.current_gesture_type,
+            'samples': samples,
             'action_type': self.current_action_type,
             'action_value': self.current_action_value
         }
+        if self.current_gesture_type == "static":
+            gesture['prototypes'] = condense_samples(samples)
+        self.gesture_data[self.current_gesture_name] = gesture
         
         # Save to file
         try:
@@ -385,16 +609,17 @@ class HandGestureTrainer:
             self.save_button.config(state="disabled")
             
             # Reset for new recording
-            self.current_samples = []
-            self.sample_count = 0
-            self.sample_count_var.set(f"{self.sample_count}/{self.required_samples}")
+            with self.state_lock:
+                self.current_samples = []
+                self.sample_count = 0
+            self.sample_count_var.set(f"0/{self.required_samples}")
             
             # Update gesture list
             self.update_gesture_list()
             
             # Update recognizer
             self.recognizer.set_gesture_data(self.gesture_data)
-            
+        
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save gesture: {str(e)}")
     
@@ -403,7 +628,7 @@ class HandGestureTrainer:
             if os.path.exists('gestures/gestures.pkl'):
                 with open('gestures/gestures.pkl', 'rb') as f:
                     self.gesture_data = pickle.load(f)
-                    
+                
                 # Update recognizer
                 self.recognizer.set_gesture_data(self.gesture_data)
         except Exception as e:
@@ -419,6 +644,7 @@ class HandGestureTrainer:
         for name, data in self.gesture_data.items():
             self.gesture_tree.insert('', 'end', values=(
                 name, 
+                data.get('type', 'static'), 
                 data['action_type'], 
                 data['action_value'], 
                 len(data['samples'])
@@ -448,7 +674,7 @@ class HandGestureTrainer:
                     
                     # Update recognizer
                     self.recognizer.set_gesture_data(self.gesture_data)
-                    
+                
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to save changes: {str(e)}")
     
@@ -486,6 +712,11 @@ class HandGestureTrainer:
                 with open(filename, 'rb') as f:
                     imported_data = pickle.load(f)
                 
+                # Condense gestures exported before prototypes were stored
+                for data in imported_data.values():
+                    if data.get('type', 'static') == 'static' and 'prototypes' not in data and data['samples']:
+                        data['prototypes'] = condense_samples(data['samples'])
+                
                 # Merge with existing gestures
                 if messagebox.askyesno("Confirm", "Replace existing gestures with the same name?"):
                     self.gesture_data.update(imported_data)
@@ -514,53 +745,96 @@ class HandGestureTrainer:
                 messagebox.showerror("Error", "No gestures available for testing")
                 return
             
-            self.testing_active = True
+            with self.state_lock:
+                self.testing_active = True
+            self.scheduler.wake()
             self.test_button.config(text="Stop Testing")
             self.detected_gesture_var.set("Waiting...")
             self.detected_action_var.set("None")
         else:
-            self.testing_active = False
+            with self.state_lock:
+                self.testing_active = False
             self.test_button.config(text="Start Testing")
             self.detected_gesture_var.set("None")
             self.detected_action_var.set("None")
             self.confidence_var.set("0%")
     
-    def recognize_gesture(self, landmarks, frame):
-        """Use the recognizer to identify the gesture"""
+    def toggle_landmark_recording(self):
+        if self.landmark_recorder is None:
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".lmk",
+                filetypes=[("Landmark recordings", "*.lmk"), ("All files", "*.*")]
+            )
+            if not filename:
+                return
+            
+            try:
+                self.landmark_recorder = LandmarkRecorder(filename)
+                self.landmark_record_button.config(text="Stop Landmark Recording")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not start recording: {str(e)}")
+        else:
+            recorder, self.landmark_recorder = self.landmark_recorder, None
+            recorder.close()
+            self.landmark_record_button.config(text="Record Landmarks")
+            messagebox.showinfo("Info", f"Recorded {recorder.frames} frames to {recorder.path}")
+    
+    def recognize_gestures(self, packet):
+        """Use the recognizer to identify the gesture of every tracked hand"""
         if not self.gesture_data:
             return
         
-        best_match, best_score, confidence = self.recognizer.recognize(landmarks)
+        # One batched matcher call for all hands
+        results = self.recognizer.recognize_actions(packet['landmarks'], packet['hand_ids'])
         
-        if best_match:
-            # Update UI
-            self.detected_gesture_var.set(best_match)
-            
-            action_type = self.gesture_data[best_match]['action_type']
-            action_value = self.gesture_data[best_match]['action_value']
-            self.detected_action_var.set(f"{action_type}: {action_value}")
-            self.confidence_var.set(f"{confidence}%")
-            
-            # Display on frame
-            cv2.putText(frame, f"Gesture: {best_match}", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Execute the action if confidence is high enough
-            if confidence > 70:
-                self.recognizer.execute_action(action_type, action_value)
+        detected = []
+        for hand_id, best_match, best_score, confidence, action in results:
+            hand = self.hand_tracker.handedness(hand_id) or f"Hand {hand_id}"
+            if best_match:
+                gesture = self.gesture_data[best_match]
+                detected.append((hand, best_match, f"{gesture['action_type']}: {gesture['action_value']}", confidence))
+                
+                # Display on frame
+                packet['overlays'].append((f"{hand}: {best_match}", (0, 255, 0)))
+                
+                # Execute the action if confidence is high enough
+                if action:
+                    self.dispatch_action(action)
+            else:
+                detected.append((hand, "Unknown", "None", confidence))
+                packet['overlays'].append((f"{hand}: unknown gesture", (255, 0, 0)))
+        
+        # Update UI from the main thread; hands are only named when there is more than one
+        if len(detected) == 1:
+            _, gesture, action, confidence = detected[0]
+            self.renderer.call(self.show_recognition, gesture, action, f"{confidence}%")
         else:
-            self.detected_gesture_var.set("Unknown")
-            self.detected_action_var.set("None")
-            self.confidence_var.set(f"{confidence}%")
-            
-            cv2.putText(frame, "Unknown gesture", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            self.renderer.call(self.show_recognition,
+                               ", ".join(f"{hand}: {gesture}" for hand, gesture, _, _ in detected),
+                               ", ".join(f"{hand}: {action}" for hand, _, action, _ in detected),
+                               ", ".join(f"{confidence}%" for _, _, _, confidence in detected))
+    
+    def show_recognition(self, gesture, action, confidence):
+        self.detected_gesture_var.set(gesture)
+        self.detected_action_var.set(action)
+        self.confidence_var.set(confidence)
     
     def on_closing(self):
         """Handle window closing"""
-        self.stop_thread = True
-        if self.thread:
-            self.thread.join(timeout=1.0)
+        if self.pipeline:
+            self.pipeline.stop()
+        
+        if self.inference_pool:
+            self.inference_pool.stop()
+            self.inference_pool = None
+        
+        if self.grabber:
+            self.grabber.stop()
+        
+        self.renderer.stop()
+        
+        if self.landmark_recorder:
+            self.landmark_recorder.close()
         
         if self.cap and self.cap.isOpened():
             self.cap.release()
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Wrist and finger bases: the palm centre barely moves when fingers do
+PALM_POINTS = [0, 5, 9, 13, 17]
+
+def training_sample(landmarks, hand_ids):
+    """Landmarks recorded for training: gestures are trained on one hand, the one in view the longest"""
+    # Track IDs only grow, so the smallest belongs to the oldest track
+    first = hand_ids.index(min(hand_ids))
+    return landmarks[first].tolist()
+
+class HandTracker:
+    """Assigns detected hands stable track IDs from frame to frame"""
+    
+    def __init__(self, max_distance=0.2, max_missed=10, handedness_penalty=0.1):
+        # Largest palm-centre jump (normalized image units) still treated as the same hand
+        self.max_distance = max_distance
+        # Frames a track survives without a matching detection
+        self.max_missed = max_missed
+        self.handedness_penalty = handedness_penalty
+        self.tracks = {}
+        self.next_id = 0
+        # IDs of the tracks dropped by the last update
+        self.removed = []
+    
+    def reset(self):
+        self.removed = list(self.tracks)
+        self.tracks = {}
+    
+    def update(self, landmarks, handedness=None):
+        """Track IDs for (n, 21, 3) landmarks, in detection order"""
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+        handedness = list(handedness or [])
+        handedness += [None] * (len(landmarks) - len(handedness))
+        centers = landmarks[:, PALM_POINTS, :2].mean(axis=1)
+        
+        # Greedy matching on palm-centre distance, cheapest pairs first
+        track_ids = list(self.tracks)
+        ids = [None] * len(landmarks)
+        if track_ids and len(landmarks):
+            track_centers = np.array([self.tracks[t]['center'] for t in track_ids])
+            costs = np.linalg.norm(track_centers[:, None, :] - centers[None, :, :], axis=2)
+            for row, track_id in enumerate(track_ids):
+                label = self.tracks[track_id]['handedness']
+                for col, detected in enumerate(handedness):
+                    if label is not None and detected is not None and label != detected:
+                        costs[row, col] += self.handedness_penalty
+            
+            used_tracks = set()
+            for flat in np.argsort(costs, axis=None):
+                row, col = divmod(int(flat), len(landmarks))
+                if costs[row, col] > self.max_distance:
+                    break
+                if row in used_tracks or ids[col] is not None:
+                    continue
+                used_tracks.add(row)
+                ids[col] = track_ids[row]
+        
+        for col, track_id in enumerate(ids):
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+                ids[col] = track_id
+            self.tracks[track_id] = {
+                'center': centers[col],
+                'handedness': handedness[col] or self.tracks.get(track_id, {}).get('handedness'),
+                'missed': 0
+            }
+        
+        # Age the tracks nobody matched and drop the stale ones
+        self.removed = []
+        for track_id in track_ids:
+            if track_id in ids:
+                continue
+            self.tracks[track_id]['missed'] += 1
+            if self.tracks[track_id]['missed'] > self.max_missed:
+                del self.tracks[track_id]
+                self.removed.append(track_id)
+        return ids
+    
+    def handedness(self, track_id):
+        track = self.tracks.get(track_id)
+        return track['handedness'] if track else None
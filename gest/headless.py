@@ -0,0 +1,191 @@
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+from gesture_recognizer import GestureRecognizer
+from frame_scheduler import FrameRateScheduler
+from runtime import GestureRuntime, build_detector
+from inference_pool import HandInferencePool
+
+log = logging.getLogger("gest.headless")
+
+DEFAULT_CONFIG = {
+    # Camera index, video file, image directory or "synthetic"
+    "source": 0,
+    "realtime": True,
+    "mirror": True,
+    "gestures_path": "gestures/gestures.pkl",
+    # Keyword arguments for GestureRecognizer, e.g. {"backend": "classifier", "model_path": "..."}
+    "recognizer": {},
+    
+    # Thresholds
+    "min_confidence": 70,
+    "action_cooldown": 1.0,
+    "max_num_hands": 2,
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+    
+    # Rates
+    "target_fps": 30,
+    "idle_fps": 5,
+    "idle_after": 60,
+    "inference_scale": 0.5,
+    "track_roi": True,
+    "queue_size": 2,
+    # Worker processes running MediaPipe; 0 runs it on the inference thread
+    "inference_workers": 0,
+    
+    # Logging
+    "log_level": "INFO",
+    # Seconds between throughput reports, 0 for none
+    "stats_interval": 60
+}
+
+def load_config(path=None):
+    """Defaults overridden by the keys of a JSON config file"""
+    config = dict(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(DEFAULT_CONFIG)
+        if unknown:
+            raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+        config.update(overrides)
+    return config
+
+def build_runtime(config):
+    recognizer = GestureRecognizer(**config["recognizer"])
+    recognizer.action_cooldown = config["action_cooldown"]
+    detect = detect_roi = inference_pool = None
+    if config["inference_workers"] > 0:
+        inference_pool = HandInferencePool(
+            config["inference_workers"],
+            static_image_mode=False,
+            max_num_hands=config["max_num_hands"],
+            min_detection_confidence=config["min_detection_confidence"],
+            min_tracking_confidence=config["min_tracking_confidence"]
+        )
+    else:
+        detect, detect_roi = [build_detector(config["max_num_hands"], config["min_detection_confidence"],
+                                             config["min_tracking_confidence"]) for _ in range(2)]
+    scheduler = None
+    if config["realtime"]:
+        scheduler = FrameRateScheduler(config["target_fps"], config["idle_fps"], config["idle_after"])
+    
+    runtime = GestureRuntime(
+        source=config["source"],
+        realtime=config["realtime"],
+        gestures_path=config["gestures_path"],
+        recognizer=recognizer,
+        detect=detect,
+        detect_roi=detect_roi,
+        inference_pool=inference_pool,
+        queue_size=config["queue_size"],
+        min_confidence=config["min_confidence"],
+        mirror=config["mirror"],
+        scheduler=scheduler,
+        inference_scale=config["inference_scale"],
+        track_roi=config["track_roi"],
+        max_num_hands=config["max_num_hands"]
+    )
+    runtime.recognition_enabled = True
+    return runtime
+
+async def run(config, started=None):
+    """Recognize gestures and fire their actions until the source ends or the task is cancelled"""
+    runtime = build_runtime(config)
+    await runtime.start()
+    if started is not None:
+        log.info("Started in %.2fs", time.perf_counter() - started)
+    log.info("Recognizing %d gestures from source %r", len(runtime.gesture_data), config["source"])
+    
+    events = runtime.subscribe(maxsize=runtime.queue_size)
+    finished = asyncio.create_task(runtime.wait_finished())
+    frames = 0
+    last_report = time.perf_counter()
+    # Last gesture per hand, so a held gesture is logged once rather than every frame
+    current = {}
+    event = None
+    try:
+        while True:
+            event = asyncio.create_task(events.get())
+            done, _ = await asyncio.wait({event, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if event not in done:
+                break
+            packet = event.result()
+            frames += 1
+            
+            seen = set()
+            for hand_id, gesture, confidence in packet['results']:
+                seen.add(hand_id)
+                if confidence <= config["min_confidence"]:
+                    gesture = None
+                if gesture != current.get(hand_id):
+                    current[hand_id] = gesture
+                    if gesture:
+                        action = runtime.gesture_data[gesture]
+                        log.info("Hand %s: %s (%d%%) -> %s %s", hand_id, gesture, confidence,
+                                 action['action_type'], action['action_value'])
+            for hand_id in set(current) - seen:
+                del current[hand_id]
+            
+            now = time.perf_counter()
+            if config["stats_interval"] and now - last_report >= config["stats_interval"]:
+                log.info("%.1f fps, %d hands in view", frames / (now - last_report), len(packet['hand_ids']))
+                frames = 0
+                last_report = now
+        log.info("Source finished")
+    finally:
+        for task in (event, finished):
+            if task is not None:
+                task.cancel()
+        runtime.unsubscribe(events)
+        await runtime.stop()
+
+def main():
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Recognize gestures and perform their actions without the UI")
+    parser.add_argument("--config", help="JSON file overriding the default settings")
+    parser.add_argument("--print-config", action="store_true", help="print the effective settings and exit")
+    args = parser.parse_args()
+    
+    try:
+        config = load_config(args.config)
+    except Exception as e:
+        print(f"Error loading config: {str(e)}")
+        sys.exit(1)
+    if args.print_config:
+        print(json.dumps(config, indent=4))
+        return
+    
+    logging.basicConfig(stream=sys.stdout, level=config["log_level"],
+                        format="%(asctime)s %(levelname)s %(message)s")
+    
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(run(config, started))
+    # Stop cleanly on Ctrl+C or a service manager's SIGTERM
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops have no signal handlers; Ctrl+C still raises KeyboardInterrupt
+            pass
+    
+    try:
+        loop.run_until_complete(task)
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        if not task.done():
+            task.cancel()
+            loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        log.info("Stopped")
+    except Exception as e:
+        log.error("Error running gesture recognition: %s", str(e))
+        sys.exit(1)
+    finally:
+        loop.close()
+
+if __name__ == "__main__":
+    main()
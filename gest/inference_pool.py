@@ -0,0 +1,182 @@
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+def _inference_worker(shm_name, slot_count, frame_shape, task_queue, result_queue, options):
+    """Worker process: run MediaPipe Hands on RGB frames placed in shared-memory slots"""
+    import mediapipe
+    
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slot_count,) + tuple(frame_shape), dtype=np.uint8, buffer=shm.buf)
+    hands = mediapipe.solutions.hands.Hands(**options)
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            seq, slot = task
+            
+            try:
+                results = hands.process(frames[slot])
+                hand_list = results.multi_hand_landmarks or []
+                # Compact result: (hands, 21, 3) float32 plus one label per hand
+                landmarks = np.array([[[lm.x, lm.y, lm.z] for lm in hand.landmark] for hand in hand_list],
+                                     dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+                handedness = [h.classification[0].label for h in (results.multi_handedness or [])]
+            except Exception as e:
+                print(f"Error in inference worker: {str(e)}")
+                landmarks = np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+                handedness = []
+            result_queue.put((seq, slot, landmarks, handedness))
+    finally:
+        hands.close()
+        del frames
+        shm.close()
+
+class HandInferencePool:
+    """Runs hand-landmark inference in worker processes fed through shared-memory frame slots"""
+    
+    def __init__(self, num_workers=2, slots_per_worker=2, result_timeout=1.0, on_drop=None, **hands_options):
+        self.num_workers = num_workers
+        self.slot_count = num_workers * slots_per_worker
+        self.result_timeout = result_timeout
+        self.hands_options = hands_options
+        # Called with every frame that will not come back from process(), e.g. to recycle its buffer
+        self.on_drop = on_drop
+        
+        self.shm = None
+        self.frames = None
+        self.frame_shape = None
+        self.workers = []
+        self.task_queue = None
+        self.result_queue = None
+        
+        # Ring of frame slots, the frames in flight and the reorder buffer
+        self.free_slots = []
+        self.in_flight = {}
+        self.completed = {}
+        self.abandoned = set()
+        self.next_seq = 0
+        
+        # Counters
+        self.frames_processed = 0
+        self.frames_dropped = 0
+    
+    def start(self, frame_shape):
+        """Allocate the slots for frames of frame_shape and launch the workers"""
+        self.frame_shape = tuple(frame_shape)
+        frame_size = int(np.prod(frame_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_size * self.slot_count)
+        self.frames = np.ndarray((self.slot_count,) + tuple(frame_shape), dtype=np.uint8, buffer=self.shm.buf)
+        self.free_slots = list(range(self.slot_count))
+        
+        # spawn keeps the workers free of the Tk and camera state of the parent
+        context = mp.get_context("spawn")
+        self.task_queue = context.Queue()
+        self.result_queue = context.Queue()
+        for _ in range(self.num_workers):
+            worker = context.Process(target=_inference_worker,
+                                     args=(self.shm.name, self.slot_count, tuple(frame_shape), self.task_queue,
+                                           self.result_queue, self.hands_options))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+    
+    def stop(self):
+        for _ in self.workers:
+            self.task_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout=1.0)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+        
+        if self.shm:
+            self.frames = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+        
+        # Frames still in flight never get their results
+        for seq in sorted(self.in_flight):
+            self._drop(self.in_flight.pop(seq))
+        self.completed = {}
+        self.abandoned = set()
+    
+    def submit(self, frame):
+        """Copy frame into a free slot and queue it; returns its sequence number or None if all slots are busy"""
+        if self.shm is not None and frame.shape != self.frame_shape:
+            # The slots are sized for one frame shape: start over with the new one
+            self.stop()
+        if self.shm is None:
+            self.start(frame.shape)
+        
+        self._drain()
+        if not self.free_slots:
+            self.frames_dropped += 1
+            self._drop(frame)
+            return None
+        
+        slot = self.free_slots.pop()
+        np.copyto(self.frames[slot], frame)
+        seq = self.next_seq
+        self.next_seq += 1
+        self.in_flight[seq] = frame
+        self.task_queue.put((seq, slot))
+        return seq
+    
+    def process(self, frame):
+        """Submit frame and return (frame, landmarks, handedness) for the oldest frame in flight"""
+        # Keeping num_workers frames in flight lets the workers run in parallel;
+        # results trail the input by num_workers - 1 frames
+        self.submit(frame)
+        if len(self.in_flight) < self.num_workers:
+            return None
+        return self.collect()
+    
+    def collect(self):
+        """Wait for the oldest frame in flight and return it with its landmarks, in sequence order"""
+        if not self.in_flight:
+            return None
+        
+        seq = min(self.in_flight)
+        deadline = time.time() + self.result_timeout
+        while seq not in self.completed:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self._receive(remaining):
+                # Give up on this frame; its slot is freed when the late result arrives
+                self.abandoned.add(seq)
+                return self.in_flight.pop(seq), np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), []
+        
+        landmarks, handedness = self.completed.pop(seq)
+        self.frames_processed += 1
+        return self.in_flight.pop(seq), landmarks, handedness
+    
+    def _drop(self, frame):
+        if self.on_drop is not None:
+            self.on_drop(frame)
+    
+    def _drain(self):
+        while self._receive(0):
+            pass
+    
+    def _receive(self, timeout):
+        """Move one result from the workers into the reorder buffer"""
+        try:
+            if timeout > 0:
+                seq, slot, landmarks, handedness = self.result_queue.get(timeout=timeout)
+            else:
+                seq, slot, landmarks, handedness = self.result_queue.get_nowait()
+        except queue.Empty:
+            return False
+        
+        self.free_slots.append(slot)
+        if seq in self.abandoned:
+            self.abandoned.discard(seq)
+        else:
+            self.completed[seq] = (landmarks, handedness)
+        return True
@@ -0,0 +1,113 @@
+import os
+import time
+import struct
+from threading import Lock
+import numpy as np
+from hand_tracker import HandTracker
+
+MAGIC = b'GESTLMK1'
+# Magic, max hands per record, wall-clock start of the recording
+HEADER = struct.Struct('<8sId')
+HEADER_SIZE = 32
+LANDMARK_VALUES = 21 * 3
+
+def record_size(max_hands):
+    """float32 values per record: timestamp, hand count, then max_hands * 21 * 3 landmarks"""
+    return 2 + max_hands * LANDMARK_VALUES
+
+class LandmarkRecorder:
+    """Appends per-frame hand landmarks to a file of fixed-size float32 records"""
+    
+    def __init__(self, path, max_hands=2):
+        self.path = path
+        self.max_hands = max_hands
+        self.start_time = time.time()
+        self.frames = 0
+        self.record = np.zeros(record_size(max_hands), dtype=np.float32)
+        # Frames are written from the pipeline while the UI thread may close the file
+        self.lock = Lock()
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, max_hands, self.start_time).ljust(HEADER_SIZE, b'\0'))
+    
+    def write(self, hands, timestamp=None):
+        """Record one frame; hands is a sequence of (21, 3) landmark arrays, possibly empty"""
+        if timestamp is None:
+            timestamp = time.time()
+        hands = hands[:self.max_hands]
+        
+        with self.lock:
+            if self.file is None:
+                return
+            self.record.fill(0)
+            # Seconds since the start keep enough precision in float32 for long sessions
+            self.record[0] = timestamp - self.start_time
+            self.record[1] = len(hands)
+            for i, hand in enumerate(hands):
+                start = 2 + i * LANDMARK_VALUES
+                self.record[start:start + LANDMARK_VALUES] = np.asarray(hand, dtype=np.float32).reshape(-1)
+            self.file.write(self.record.tobytes())
+            self.frames += 1
+    
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+class LandmarkLog:
+    """Read-only, memory-mapped view of a landmark recording"""
+    
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, self.max_hands, self.start_time = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a landmark recording")
+        
+        size = record_size(self.max_hands)
+        count = (os.path.getsize(path) - HEADER_SIZE) // (4 * size)
+        # A recording cut short may end in a partial record, which is ignored
+        if count > 0:
+            self.records = np.memmap(path, dtype=np.float32, mode='r', offset=HEADER_SIZE, shape=(count, size))
+        else:
+            self.records = np.zeros((0, size), dtype=np.float32)
+        self.timestamps = self.records[:, 0]
+        self.hand_counts = self.records[:, 1].astype(np.int32)
+        self.landmarks = self.records[:, 2:].reshape(count, self.max_hands, 21, 3)
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def frames(self):
+        """Yield (timestamp, hands) per recorded frame, hands being (n, 21, 3)"""
+        for timestamp, count, hands in zip(self.timestamps, self.hand_counts, self.landmarks):
+            yield float(timestamp), hands[:count]
+
+def replay_landmarks(log, recognizer, dispatch=None, realtime=False, min_confidence=70):
+    """Drive a recognizer from a recording as the trainer's testing mode would, without MediaPipe"""
+    # One (frame index, hand ID, timestamp, gesture, confidence) entry per action that would have fired
+    triggered = []
+    tracker = HandTracker()
+    start = time.perf_counter()
+    for index, (timestamp, hands) in enumerate(log.frames()):
+        if realtime:
+            # Hold each frame until its recorded time
+            delay = timestamp - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        
+        # Handedness is not recorded, so hands are tracked by position alone
+        hand_ids = tracker.update(hands)
+        recognizer.forget_hands(tracker.removed)
+        if not len(hands):
+            continue
+        
+        for hand_id, best_match, _, confidence, action in recognizer.recognize_actions(hands, hand_ids, min_confidence):
+            if action:
+                triggered.append((index, hand_id, timestamp, best_match, confidence))
+                if dispatch is not None:
+                    dispatch(action)
+    return triggered
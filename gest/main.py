@@ -1,24 +1,26 @@
+import time
+# Taken before the other imports so --startup-time includes them
+START_TIME = time.perf_counter()
+
 import sys
 import os
+import argparse
+import importlib.util
 import tkinter as tk
-from hand_gesture_trainer import HandGestureTrainer
 
 def check_dependencies():
     """Check for required packages"""
     required_packages = {
-        'opencv-python': 'cv2', 
-        'mediapipe': 'mediapipe', 
+        'opencv-python': 'cv2',
+        'mediapipe': 'mediapipe',
         'numpy': 'numpy',
         'pyautogui': 'pyautogui',
         'pillow': 'PIL'
     }
     
-    missing_packages = []
-    for package, module in required_packages.items():
-        try:
-            __import__(module)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec locates a package without importing it
+    missing_packages = [package for package, module in required_packages.items()
+                        if importlib.util.find_spec(module) is None]
     
     if missing_packages:
         print("Missing required packages. Please install the following packages:")
@@ -29,13 +31,49 @@ def check_dependencies():
         input("Press Enter to exit...")
         sys.exit(1)
 
+def measure_startup(root, app):
+    """Report the time to the first window and to the first processed frame, then exit"""
+    def elapsed():
+        return time.perf_counter() - START_TIME
+    
+    def on_map(event):
+        if event.widget is root and 'window' not in timings:
+            timings['window'] = elapsed()
+            print(f"First window: {timings['window']:.2f}s")
+            # Start the camera as the user would, once the window is up
+            root.after_idle(app.toggle_camera)
+    
+    def on_first_frame():
+        print(f"First processed frame: {elapsed():.2f}s")
+        root.after_idle(app.on_closing)
+    
+    timings = {}
+    root.bind("<Map>", on_map, add="+")
+    app.on_first_frame = on_first_frame
+
 def main():
+    parser = argparse.ArgumentParser(description="Train and test hand gestures")
+    parser.add_argument("--source", default=None, help="camera index, video file, image directory or 'synthetic'")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="start the camera, report the time to the first window and frame, and exit")
+    parser.add_argument("--inference-workers", type=int, default=0,
+                        help="worker processes running hand-landmark inference (0: in the app process)")
+    args = parser.parse_args()
+    
     # Check for required packages
     check_dependencies()
     
+    # Imported after the check so a missing package is reported instead of raising
+    from hand_gesture_trainer import HandGestureTrainer
+    
     # Start the application
     root = tk.Tk()
     app = HandGestureTrainer(root)
+    if args.source is not None:
+        app.frame_source = args.source
+    app.inference_workers = args.inference_workers
+    if args.startup_time:
+        measure_startup(root, app)
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+import sys
+import time
+import pickle
+import argparse
+from gesture_recognizer import GestureRecognizer
+from landmark_log import LandmarkLog, replay_landmarks
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through the gesture recognizer")
+    parser.add_argument("recording", help="landmark recording (.lmk) made in the Testing tab")
+    parser.add_argument("--gestures", default="gestures/gestures.pkl", help="gesture library to recognize against")
+    parser.add_argument("--realtime", action="store_true", help="replay at the recorded speed")
+    parser.add_argument("--execute", action="store_true", help="perform the actions instead of only listing them")
+    args = parser.parse_args()
+    
+    try:
+        with open(args.gestures, 'rb') as f:
+            gesture_data = pickle.load(f)
+        log = LandmarkLog(args.recording)
+    except Exception as e:
+        print(f"Error loading replay inputs: {str(e)}")
+        sys.exit(1)
+    
+    recognizer = GestureRecognizer()
+    recognizer.set_gesture_data(gesture_data)
+    dispatch = None
+    if args.execute:
+        dispatch = lambda action: recognizer.execute_action(*action)
+    
+    start = time.perf_counter()
+    triggered = replay_landmarks(log, recognizer, dispatch, args.realtime)
+    elapsed = time.perf_counter() - start
+    
+    for index, hand_id, timestamp, gesture, confidence in triggered:
+        print(f"{timestamp:8.3f}s  frame {index:6d}  hand {hand_id}  {gesture} ({confidence}%)")
+    print(f"{len(log)} frames in {elapsed:.3f}s ({len(log) / elapsed if elapsed else 0:.0f} fps), "
+          f"{len(triggered)} actions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import cv2
+import numpy as np
+
+# Crops smaller than this (in pixels) are not worth tracking
+MIN_ROI_SIZE = 32
+
+class HandROITracker:
+    """Chooses the image handed to the landmark model: a downscaled frame, or a crop around the tracked hand"""
+    
+    def __init__(self, detect, inference_scale=0.5, track_roi=True, roi_padding=0.3, roi_size=256,
+                 max_hands=2, full_frame_interval=10, detect_roi=None):
+        # detect(rgb_image) -> ((hands, 21, 3) landmarks normalized to that image, handedness)
+        self.detect = detect
+        # A video-mode model tracks from the previous image's landmarks, so feeding one model
+        # both crops and full frames makes it search the wrong place on every switch; give the
+        # crops their own model. Without one, crops share detect (fine for stateless detectors)
+        self.detect_roi = detect_roi or detect
+        self.inference_scale = inference_scale
+        self.track_roi = track_roi
+        self.roi_padding = roi_padding
+        self.roi_size = roi_size
+        # While fewer than max_hands are tracked, every full_frame_interval-th frame
+        # searches the whole frame so a hand entering outside the crop is found
+        self.max_hands = max_hands
+        self.full_frame_interval = full_frame_interval
+        self.frames_since_full = 0
+        self.tracked = None
+        # Reused destination of the downscaled full frame
+        self.small_frame = None
+        
+        # Size of the image the model saw for the last frame, and running totals
+        self.last_input_size = None
+        self.last_mode = None
+        self.frames_full = 0
+        self.frames_roi = 0
+        self.pixels_processed = 0
+        self.pixels_total = 0
+    
+    def reset(self):
+        self.tracked = None
+    
+    def process(self, frame):
+        """Landmarks for frame in full-frame normalized coordinates, plus handedness"""
+        height, width = frame.shape[:2]
+        self.pixels_total += width * height
+        
+        landmarks, handedness = None, []
+        if self.track_roi and self.tracked is not None and not self._full_frame_due():
+            landmarks, handedness = self._detect_roi(frame, self.tracked)
+        
+        # Tracking lost (or not tracking yet, or looking for more hands): search the whole frame
+        if landmarks is None or len(landmarks) == 0:
+            landmarks, handedness = self._detect_full(frame)
+        
+        self.tracked = landmarks if len(landmarks) else None
+        return landmarks, handedness
+    
+    def _full_frame_due(self):
+        """Whether a full-frame pass is due to look for hands outside the crop"""
+        if len(self.tracked) >= self.max_hands:
+            return False
+        return self.frames_since_full + 1 >= self.full_frame_interval
+    
+    def inference_ratio(self):
+        """Fraction of captured pixels actually passed to the model"""
+        return self.pixels_processed / self.pixels_total if self.pixels_total else 1.0
+    
+    def _detect_full(self, frame):
+        image = frame
+        if self.inference_scale < 1.0:
+            height, width = frame.shape[:2]
+            size = (int(width * self.inference_scale), int(height * self.inference_scale))
+            if self.small_frame is None or self.small_frame.shape[:2] != (size[1], size[0]):
+                self.small_frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            else:
+                cv2.resize(frame, size, dst=self.small_frame, interpolation=cv2.INTER_AREA)
+            image = self.small_frame
+        # Normalized coordinates are unaffected by a uniform resize
+        landmarks, handedness = self._run(image, "full")
+        self.frames_full += 1
+        self.frames_since_full = 0
+        return landmarks, handedness
+    
+    def _detect_roi(self, frame, previous):
+        height, width = frame.shape[:2]
+        box = self._roi_box(previous, width, height)
+        if box is None:
+            return None, []
+        x0, y0, x1, y1 = box
+        crop = frame[y0:y1, x0:x1]
+        crop_width = x1 - x0
+        
+        # Only ever shrink the crop
+        scale = min(1.0, self.roi_size / max(crop.shape[:2]))
+        if scale < 1.0:
+            crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        landmarks, handedness = self._run(crop, "roi")
+        if len(landmarks) == 0:
+            return landmarks, handedness
+        self.frames_roi += 1
+        self.frames_since_full += 1
+        
+        # Map crop-normalized landmarks back to the full frame; z shares the x scale
+        mapped = landmarks.copy()
+        mapped[:, :, 0] = (landmarks[:, :, 0] * crop_width + x0) / width
+        mapped[:, :, 1] = (landmarks[:, :, 1] * (y1 - y0) + y0) / height
+        mapped[:, :, 2] = landmarks[:, :, 2] * crop_width / width
+        return mapped, handedness
+    
+    def _roi_box(self, landmarks, width, height):
+        """Square box around all tracked hands, padded and clamped to the frame; None if too small"""
+        xs = landmarks[:, :, 0] * width
+        ys = landmarks[:, :, 1] * height
+        center_x = (xs.min() + xs.max()) / 2
+        center_y = (ys.min() + ys.max()) / 2
+        side = max(xs.max() - xs.min(), ys.max() - ys.min()) * (1 + 2 * self.roi_padding)
+        
+        # Landmarks can lie slightly outside the image, so clamp both corners
+        x0 = int(np.clip(center_x - side / 2, 0, width))
+        y0 = int(np.clip(center_y - side / 2, 0, height))
+        x1 = int(np.clip(center_x + side / 2, 0, width))
+        y1 = int(np.clip(center_y + side / 2, 0, height))
+        if min(x1 - x0, y1 - y0) < MIN_ROI_SIZE:
+            return None
+        return x0, y0, x1, y1
+    
+    def _run(self, image, mode):
+        self.last_input_size = (image.shape[1], image.shape[0])
+        self.last_mode = mode
+        self.pixels_processed += image.shape[0] * image.shape[1]
+        detect = self.detect_roi if mode == "roi" else self.detect
+        # A crop is a strided view; the model wants contiguous pixels
+        landmarks, handedness = detect(np.ascontiguousarray(image))
+        return np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3), handedness
@@ -0,0 +1,335 @@
+import os
+import pickle
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from gesture_recognizer import GestureRecognizer
+from frame_sources import open_frame_source
+from frame_grabber import LatestFrameGrabber
+from roi_tracker import HandROITracker
+from hand_tracker import HandTracker, training_sample
+
+def build_detector(max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.7):
+    """MediaPipe Hands with the trainer's settings, as detect(rgb_image) for HandROITracker"""
+    import mediapipe as mp
+    
+    hands = mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=max_num_hands,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    )
+    
+    def detect(image):
+        results = hands.process(image)
+        landmarks = [[[lm.x, lm.y, lm.z] for lm in hand.landmark] for hand in results.multi_hand_landmarks or []]
+        handedness = [h.classification[0].label for h in results.multi_handedness or []]
+        return landmarks, handedness
+    return detect
+
+def offer(queue, item):
+    """Put without waiting, discarding the oldest item if the queue is full"""
+    while True:
+        try:
+            queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            queue.get_nowait()
+
+# Drives headless.py and embedding asyncio services. The Tk trainer does not run on it:
+# it keeps its own thread pipeline (pooled frame buffers, drawing, visibility tracking)
+class GestureRuntime:
+    """Asyncio core running capture, inference, recognition, actions and persistence as tasks"""
+    
+    def __init__(self, source=0, realtime=True, gestures_path='gestures/gestures.pkl', recognizer=None,
+                 detect=None, queue_size=2, min_confidence=70, mirror=True, scheduler=None,
+                 inference_scale=0.5, track_roi=True, max_num_hands=2, detect_roi=None, inference_pool=None):
+        # source is anything open_frame_source accepts, or an already opened source
+        self.source_spec = source
+        self.realtime = realtime
+        self.gestures_path = gestures_path
+        self.recognizer = recognizer or GestureRecognizer()
+        # detect(rgb_image) -> (landmarks, handedness); MediaPipe by default. Hand crops go
+        # to detect_roi, a second stateful model, so neither model switches image geometry
+        self.detect = detect
+        self.detect_roi = detect_roi
+        # Optional HandInferencePool running MediaPipe in worker processes instead of detect
+        self.inference_pool = inference_pool
+        self.queue_size = queue_size
+        self.min_confidence = min_confidence
+        self.mirror = mirror
+        # Optional FrameRateScheduler throttling capture while no hand is in view
+        self.scheduler = scheduler
+        self.inference_scale = inference_scale
+        self.track_roi = track_roi
+        self.max_num_hands = max_num_hands
+        
+        # What the recognition task does with each frame; only touched on the event loop
+        self.recognition_enabled = False
+        self.actions_enabled = True
+        self.gesture_data = {}
+        
+        self.source = None
+        self.grabber = None
+        self.roi_tracker = None
+        self.hand_tracker = HandTracker()
+        self.tasks = []
+        self.subscribers = []
+        self.finished = None
+        self._recording = None
+        
+        # Blocking work runs off the loop; inference keeps one thread because
+        # the MediaPipe graph is stateful
+        self.capture_executor = None
+        self.inference_executor = None
+        self.action_executor = None
+        self.io_executor = None
+    
+    async def __aenter__(self):
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+    
+    async def start(self):
+        """Open the source, load the gestures and start the processing tasks"""
+        loop = asyncio.get_running_loop()
+        self.capture_executor = ThreadPoolExecutor(1, thread_name_prefix="runtime-capture")
+        self.inference_executor = ThreadPoolExecutor(1, thread_name_prefix="runtime-inference")
+        self.action_executor = ThreadPoolExecutor(1, thread_name_prefix="runtime-actions")
+        self.io_executor = ThreadPoolExecutor(1, thread_name_prefix="runtime-io")
+        
+        await self.load_gestures()
+        
+        if hasattr(self.source_spec, 'read'):
+            self.source = self.source_spec
+        else:
+            self.source = await loop.run_in_executor(self.io_executor, open_frame_source,
+                                                     self.source_spec, self.realtime)
+        if not self.source.isOpened():
+            await self.stop()
+            raise RuntimeError(f"Could not open video source {self.source_spec!r}")
+        
+        if self.detect is None and self.inference_pool is None:
+            # Created on the inference thread, which is the only one to use them
+            self.detect = await loop.run_in_executor(self.inference_executor, build_detector, self.max_num_hands)
+            self.detect_roi = await loop.run_in_executor(self.inference_executor, build_detector, self.max_num_hands)
+        self.roi_tracker = HandROITracker(self.detect, self.inference_scale, self.track_roi,
+                                          max_hands=self.max_num_hands, detect_roi=self.detect_roi)
+        
+        self.grabber = LatestFrameGrabber(self.source, lossless=not self.realtime)
+        self.grabber.start()
+        
+        self.finished = asyncio.Event()
+        frames = asyncio.Queue(self.queue_size)
+        packets = asyncio.Queue(self.queue_size)
+        self.actions = asyncio.Queue(self.queue_size)
+        self.tasks = [
+            asyncio.create_task(self._capture(frames), name="capture"),
+            asyncio.create_task(self._inference(frames, packets), name="inference"),
+            asyncio.create_task(self._recognition(packets), name="recognition"),
+            asyncio.create_task(self._dispatch(), name="actions")
+        ]
+    
+    async def stop(self):
+        """Cancel the tasks, wait for them and release the source and worker threads"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        
+        loop = asyncio.get_running_loop()
+        if self.grabber:
+            await loop.run_in_executor(None, self.grabber.stop)
+            self.grabber = None
+        if self.source is not None and self.source is not self.source_spec:
+            self.source.release()
+        self.source = None
+        
+        if self._recording and not self._recording[1].done():
+            self._recording[1].cancel()
+        self._recording = None
+        
+        if self.inference_pool is not None and self.inference_executor:
+            # Queued behind any frame still being handed to the workers
+            await loop.run_in_executor(self.inference_executor, self.inference_pool.stop)
+        for executor in (self.capture_executor, self.inference_executor, self.action_executor, self.io_executor):
+            if executor:
+                await loop.run_in_executor(None, executor.shutdown)
+        if self.finished:
+            self.finished.set()
+    
+    async def wait_finished(self):
+        """Wait until the source runs out (never, for a camera)"""
+        await self.finished.wait()
+    
+    def subscribe(self, maxsize=1):
+        """Queue receiving every processed frame as an event dict; slow readers only see the newest"""
+        queue = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        return queue
+    
+    def unsubscribe(self, queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+    
+    async def events(self):
+        """Async iterator over processed frames"""
+        queue = self.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+    
+    async def record_samples(self, count):
+        """Collect the landmarks of the next count frames showing a hand"""
+        if self._recording is not None:
+            raise RuntimeError("Already recording")
+        future = asyncio.get_running_loop().create_future()
+        self._recording = ([], future, count)
+        try:
+            return await future
+        finally:
+            self._recording = None
+    
+    async def load_gestures(self):
+        loop = asyncio.get_running_loop()
+        try:
+            gesture_data = await loop.run_in_executor(self.io_executor, self._read_gestures)
+        except Exception as e:
+            print(f"Error loading gestures: {str(e)}")
+            gesture_data = {}
+        self.gesture_data = gesture_data
+        self.recognizer.set_gesture_data(self.gesture_data)
+    
+    async def save_gesture(self, name, gesture):
+        """Add or replace a gesture and persist the library"""
+        self.gesture_data[name] = gesture
+        await self._persist()
+    
+    async def delete_gesture(self, name):
+        self.gesture_data.pop(name, None)
+        await self._persist()
+    
+    async def _persist(self):
+        # Recompile on the loop so recognition never sees a half-updated recognizer
+        self.recognizer.set_gesture_data(self.gesture_data)
+        snapshot = dict(self.gesture_data)
+        await asyncio.get_running_loop().run_in_executor(self.io_executor, self._write_gestures, snapshot)
+    
+    def _read_gestures(self):
+        if not os.path.exists(self.gestures_path):
+            return {}
+        with open(self.gestures_path, 'rb') as f:
+            return pickle.load(f)
+    
+    def _write_gestures(self, gesture_data):
+        directory = os.path.dirname(self.gestures_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.gestures_path, 'wb') as f:
+            pickle.dump(gesture_data, f)
+    
+    async def _capture(self, frames):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.scheduler is not None:
+                await loop.run_in_executor(self.capture_executor, self.scheduler.wait)
+            ret, frame = await loop.run_in_executor(self.capture_executor, self.grabber.read)
+            if ret:
+                if self.realtime:
+                    offer(frames, frame)
+                else:
+                    await frames.put(frame)
+            elif not self.grabber.isOpened():
+                break
+        # The source ran out: let the other stages finish and signal the end
+        await frames.put(None)
+    
+    async def _inference(self, frames, packets):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await frames.get()
+            if frame is None:
+                if self.inference_pool is not None:
+                    # The frames still in the workers come out before the end
+                    for packet in await loop.run_in_executor(self.inference_executor, self._flush_pool):
+                        await packets.put(packet)
+                await packets.put(None)
+                return
+            packet = await loop.run_in_executor(self.inference_executor, self._detect, frame)
+            if packet is None:
+                # The inference workers are still filling up
+                continue
+            if self.realtime:
+                offer(packets, packet)
+            else:
+                await packets.put(packet)
+    
+    def _detect(self, frame):
+        """Mirror, convert and run the landmark model; runs on the inference thread"""
+        if self.mirror:
+            frame = cv2.flip(frame, 1)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.inference_pool is None:
+            landmarks, handedness = self.roi_tracker.process(frame)
+            return {'frame': frame, 'landmarks': landmarks, 'handedness': handedness}
+        
+        # Results trail the submitted frame while several are in flight
+        result = self.inference_pool.process(frame)
+        if result is None:
+            return None
+        frame, landmarks, handedness = result
+        return {'frame': frame, 'landmarks': landmarks, 'handedness': handedness}
+    
+    def _flush_pool(self):
+        packets = []
+        while self.inference_pool.in_flight:
+            frame, landmarks, handedness = self.inference_pool.collect()
+            packets.append({'frame': frame, 'landmarks': landmarks, 'handedness': handedness})
+        return packets
+    
+    async def _recognition(self, packets):
+        while True:
+            packet = await packets.get()
+            if packet is None:
+                self.finished.set()
+                return
+            
+            if self.scheduler is not None:
+                self.scheduler.report(len(packet['landmarks']) > 0)
+            packet['hand_ids'] = self.hand_tracker.update(packet['landmarks'], packet['handedness'])
+            self.recognizer.forget_hands(self.hand_tracker.removed)
+            packet['results'] = []
+            
+            if self._recording is not None and len(packet['landmarks']):
+                samples, future, count = self._recording
+                samples.append(training_sample(packet['landmarks'], packet['hand_ids']))
+                if len(samples) >= count and not future.done():
+                    future.set_result(samples)
+            
+            if self.recognition_enabled and len(packet['landmarks']):
+                packet['results'] = self._recognize(packet)
+            
+            for queue in self.subscribers:
+                offer(queue, packet)
+    
+    def _recognize(self, packet):
+        """Per-hand (hand ID, gesture, confidence), queuing the actions that fire"""
+        results = []
+        for hand_id, best_match, _, confidence, action in self.recognizer.recognize_actions(
+                packet['landmarks'], packet['hand_ids'], self.min_confidence):
+            results.append((hand_id, best_match, confidence))
+            if action and self.actions_enabled:
+                offer(self.actions, action)
+        return results
+    
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            action_type, action_value, hand_id = await self.actions.get()
+            # pyautogui blocks, so it never runs on the loop
+            await loop.run_in_executor(self.action_executor, self.recognizer.execute_action,
+                                       action_type, action_value, hand_id)
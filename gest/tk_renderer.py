@@ -0,0 +1,156 @@
+import time
+import queue
+from threading import Lock
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+class FrameMailbox:
+    """One-slot handoff: posting replaces any item the reader has not taken yet"""
+    
+    def __init__(self, on_discard=None):
+        self.lock = Lock()
+        self.item = None
+        # Called with every item replaced before it was taken, e.g. to recycle its buffer
+        self.on_discard = on_discard
+        self.posted = 0
+        self.discarded = 0
+    
+    def post(self, item):
+        with self.lock:
+            previous, self.item = self.item, item
+            self.posted += 1
+        if previous is not None:
+            self.discarded += 1
+            if self.on_discard is not None:
+                self.on_discard(previous)
+    
+    def take(self):
+        """Newest item, or None if nothing new was posted"""
+        with self.lock:
+            item, self.item = self.item, None
+        return item
+
+class TkRenderer:
+    """Renders the newest frame on the Tk main thread at a capped rate"""
+    
+    def __init__(self, root, render, fps=30, on_discard=None):
+        self.root = root
+        # render(item) runs on the main thread for each displayed frame
+        self.render = render
+        self.fps = fps
+        self.mailbox = FrameMailbox(on_discard)
+        # Widget updates requested by worker threads, applied on the next tick
+        self.calls = queue.Queue()
+        self.after_id = None
+        self.next_render_time = 0.0
+        self.rendered = 0
+    
+    @property
+    def skipped(self):
+        """Frames that were produced but replaced before they could be shown"""
+        return self.mailbox.discarded
+    
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.root.after(0, self._tick)
+    
+    def stop(self):
+        """Stop ticking; call on the main thread once the producers have stopped"""
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        
+        # Apply the last widget updates and drop the undisplayed frame
+        self._run_calls()
+        item = self.mailbox.take()
+        if item is not None and self.mailbox.on_discard is not None:
+            self.mailbox.on_discard(item)
+    
+    def post(self, item):
+        """Hand over a frame from any thread"""
+        self.mailbox.post(item)
+    
+    def call(self, func, *args, **kwargs):
+        """Run func on the main thread from any thread"""
+        self.calls.put((func, args, kwargs))
+    
+    def _run_calls(self):
+        while True:
+            try:
+                func, args, kwargs = self.calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"Error updating the UI: {str(e)}")
+    
+    def _tick(self):
+        self._run_calls()
+        
+        item = self.mailbox.take()
+        if item is not None:
+            try:
+                self.render(item)
+            except Exception as e:
+                print(f"Error rendering frame: {str(e)}")
+            self.rendered += 1
+        
+        # Deadline-based so a slow render shortens the next wait instead of adding to it
+        interval = 1.0 / self.fps
+        now = time.perf_counter()
+        self.next_render_time = max(self.next_render_time + interval, now)
+        delay = int(1000 * (self.next_render_time - now))
+        self.after_id = self.root.after(max(1, delay), self._tick)
+    
+    def stats(self):
+        return {'rendered': self.rendered, 'skipped': self.skipped, 'posted': self.mailbox.posted}
+
+class VideoSurface:
+    """Persistent PhotoImage on a label, updated in place and sized to the widget"""
+    
+    def __init__(self, label):
+        self.label = label
+        self.photo = None
+        self.size = None
+        # Label size beyond the image (border and padding), measured once an image is shown
+        self.inset = None
+        # Downscaled copy of the frame, reused while the display size stays the same
+        self.scaled = None
+        self.created = 0
+    
+    def display_size(self, frame_width, frame_height):
+        """Largest size fitting the label with the frame's aspect ratio, never above the frame's"""
+        width, height = self.label.winfo_width(), self.label.winfo_height()
+        if self.inset is not None:
+            width, height = width - self.inset[0], height - self.inset[1]
+        if width <= 1 or height <= 1:
+            # Not laid out yet
+            return frame_width, frame_height
+        
+        scale = min(width / frame_width, height / frame_height, 1.0)
+        return max(1, int(frame_width * scale)), max(1, int(frame_height * scale))
+    
+    def show(self, frame):
+        """Display an RGB frame; the frame is not kept"""
+        size = self.display_size(frame.shape[1], frame.shape[0])
+        if size != (frame.shape[1], frame.shape[0]):
+            if self.scaled is None or self.scaled.shape[:2] != (size[1], size[0]):
+                self.scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            frame = cv2.resize(frame, size, dst=self.scaled, interpolation=cv2.INTER_AREA)
+        
+        # Wrap without copying; paste copies the pixels into the existing Tk image
+        img = Image.frombuffer("RGB", size, frame, "raw", "RGB", 0, 1)
+        if size != self.size:
+            # Only a new widget size creates a new Tk image
+            self.photo = ImageTk.PhotoImage(image=img)
+            self.size = size
+            self.created += 1
+            self.label.configure(image=self.photo)
+            self.label.image = self.photo  # Keep a reference to prevent garbage collection
+            if self.inset is None:
+                self.inset = (max(0, self.label.winfo_reqwidth() - size[0]),
+                              max(0, self.label.winfo_reqheight() - size[1]))
+        else:
+            self.photo.paste(img)
@@ -0,0 +1,186 @@
+import queue
+import time
+from threading import Thread
+
+class StageQueue:
+    """Bounded queue between two stages with a drop-oldest or block policy"""
+    
+    def __init__(self, maxsize=2, policy="drop_oldest", on_drop=None):
+        self.queue = queue.Queue(maxsize)
+        self.policy = policy
+        self.dropped = 0
+        # Called with every item discarded by the queue, e.g. to recycle its frame buffer
+        self.on_drop = on_drop
+    
+    def put(self, item, is_running=lambda: True):
+        if self.policy == "block":
+            # Back-pressure: wait for the consumer, but give up on shutdown
+            while is_running():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+            self._discard(item)
+            return
+        
+        # Drop the oldest queued item to make room for the newest one
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._discard(self.queue.get_nowait())
+                    self.queue.task_done()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+    
+    def _discard(self, item):
+        if self.on_drop is not None:
+            self.on_drop(item)
+    
+    def get(self, timeout=0.1):
+        """Next item, or None if nothing arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def task_done(self):
+        self.queue.task_done()
+    
+    def join(self):
+        """Wait until every item put so far has been processed or dropped"""
+        self.queue.join()
+
+class PipelineStage:
+    """One worker thread applying func to every item from its input queue"""
+    
+    def __init__(self, name, func, input_queue, output_queue=None):
+        self.name = name
+        self.func = func
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.thread = None
+        self.running = False
+        
+        # Counters
+        self.processed = 0
+        self.busy_time = 0.0
+    
+    def start(self):
+        self.running = True
+        self.thread = Thread(target=self._run, name=f"pipeline-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+    
+    def _run(self):
+        while self.running:
+            item = self.input_queue.get()
+            if item is None:
+                continue
+            
+            start = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage: {str(e)}")
+                result = None
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+            
+            # A stage returns None to drop the item; the result is passed on
+            # before the input is marked done so join() never misses it
+            if result is not None and self.output_queue is not None:
+                self.output_queue.put(result, lambda: self.running)
+            self.input_queue.task_done()
+
+class VideoPipeline:
+    """Capture followed by processing stages, each on its own worker thread"""
+    
+    def __init__(self, source, queue_size=2, policy="drop_oldest", scheduler=None, on_drop=None):
+        # source provides read() -> (ret, frame) and isOpened(), like VideoCapture
+        self.source = source
+        # Optional FrameRateScheduler pacing the capture loop
+        self.scheduler = scheduler
+        self.queue_size = queue_size
+        self.policy = policy
+        self.on_drop = on_drop
+        self.stages = []
+        self.branches = []
+        self.capture_queue = StageQueue(queue_size, policy, on_drop)
+        self.capture_thread = None
+        self.running = False
+        self.frames_captured = 0
+    
+    def add_stage(self, name, func):
+        """Append a stage to the main line; func(item) returns the item for the next stage"""
+        input_queue = self.stages[-1].output_queue if self.stages else self.capture_queue
+        output_queue = StageQueue(self.queue_size, self.policy, self.on_drop)
+        self.stages.append(PipelineStage(name, func, input_queue, output_queue))
+    
+    def add_branch(self, name, func):
+        """Side worker fed explicitly through the returned submit(item) function"""
+        branch = PipelineStage(name, func, StageQueue(self.queue_size, self.policy))
+        self.branches.append(branch)
+        return lambda item: branch.input_queue.put(item, lambda: branch.running)
+    
+    def start(self):
+        self.running = True
+        # The last stage is a sink
+        if self.stages:
+            self.stages[-1].output_queue = None
+        for stage in self.stages + self.branches:
+            stage.start()
+        self.capture_thread = Thread(target=self._capture, name="pipeline-capture")
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+    
+    def stop(self):
+        self.running = False
+        for stage in self.stages + self.branches:
+            stage.running = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=1.0)
+        for stage in self.stages + self.branches:
+            if stage.thread:
+                stage.thread.join(timeout=1.0)
+    
+    def join(self):
+        """Wait for the source to run out and for every stage to finish its queued items"""
+        if self.capture_thread:
+            self.capture_thread.join()
+        for stage in self.stages:
+            stage.input_queue.join()
+        for branch in self.branches:
+            branch.input_queue.join()
+    
+    def is_alive(self):
+        return self.running and self.capture_thread is not None and self.capture_thread.is_alive()
+    
+    def _capture(self):
+        while self.running and self.source.isOpened():
+            if self.scheduler:
+                self.scheduler.wait()
+            ret, frame = self.source.read()
+            if not ret:
+                continue
+            self.frames_captured += 1
+            self.capture_queue.put(frame, lambda: self.running)
+        self.running = False
+    
+    def stats(self):
+        """Per-stage frame count, mean time per item and items dropped on the way in"""
+        stats = {'capture': {'processed': self.frames_captured}}
+        if self.scheduler:
+            stats['capture']['effective_fps'] = self.scheduler.effective_fps()
+            stats['capture']['idle'] = self.scheduler.idle
+        for stage in self.stages + self.branches:
+            stats[stage.name] = {
+                'processed': stage.processed,
+                'ms_per_item': 1000 * stage.busy_time / stage.processed if stage.processed else 0.0,
+                'dropped': stage.input_queue.dropped
+            }
+        return stats
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from gesture_recognizer import GestureRecognizer, StreamingDTW
+from landmark_log import LandmarkRecorder, LandmarkLog, replay_landmarks
+
+def swipe(frames=20, distance=0.4):
+    """A hand moving left to right, as (frames, 21, 3) landmarks"""
+    rng = np.random.default_rng(1)
+    hand = 0.3 + 0.1 * rng.random((21, 3))
+    steps = np.linspace(0, distance, frames)
+    motion = np.zeros((frames, 1, 3))
+    motion[:, 0, 0] = steps
+    return (hand[None] + motion).astype(np.float32)
+
+def swipe_library(template):
+    return {'swipe': {'samples': template.tolist(), 'action_type': 'keyboard',
+                      'action_value': 'right', 'type': 'dynamic'}}
+
+def test_template_replay_fires_above_action_threshold():
+    template = swipe()
+    recognizer = GestureRecognizer()
+    recognizer.set_gesture_data(swipe_library(template))
+    
+    results = []
+    # The hand rests for a moment once the motion is done
+    for frame in list(template) + [template[-1]] * 3:
+        results.append(recognizer.recognize_dynamic(frame, hand_id=0))
+    
+    fired = [result for result in results if result[0] is not None]
+    assert len(fired) == 1
+    assert fired[0][0] == 'swipe'
+    assert fired[0][2] > 70
+
+def test_no_match_while_cost_is_still_falling():
+    template = swipe()
+    recognizer = GestureRecognizer()
+    recognizer.set_gesture_data(swipe_library(template))
+    
+    for frame in template:
+        match, _, _ = recognizer.recognize_dynamic(frame, hand_id=0)
+        assert match is None
+
+def test_replayed_recording_dispatches_the_action(tmp_path):
+    template = swipe()
+    gesture_data = swipe_library(template)
+    
+    path = str(tmp_path / "swipe.lmk")
+    recorder = LandmarkRecorder(path)
+    for i, frame in enumerate(list(template) + [template[-1]] * 3):
+        recorder.write([frame], timestamp=recorder.start_time + i / 30)
+    recorder.close()
+    
+    recognizer = GestureRecognizer()
+    recognizer.set_gesture_data(gesture_data)
+    dispatched = []
+    triggered = replay_landmarks(LandmarkLog(path), recognizer, dispatched.append)
+    
+    assert [entry[3] for entry in triggered] == ['swipe']
+    assert dispatched == [('keyboard', 'right', 0)]
+
+def brute_force_subsequence_dtw(stream, template):
+    """Per-frame cost of the best alignment of the whole template with a stretch of stream ending at its last frame"""
+    n, m = len(stream), len(template)
+    cost = np.full((n, m), np.inf)
+    for t in range(n):
+        for j in range(m):
+            local = float(((stream[t] - template[j]) ** 2).sum())
+            if j == 0:
+                # A match may start at any frame
+                cost[t, j] = local
+                continue
+            predecessors = [cost[t, j - 1]]
+            if t > 0:
+                predecessors += [cost[t - 1, j], cost[t - 1, j - 1]]
+            cost[t, j] = local + min(predecessors)
+    return cost[-1, -1] / m
+
+def test_streaming_dtw_matches_brute_force():
+    rng = np.random.default_rng(3)
+    template = rng.random((6, 4))
+    # A stretched, noisy copy of the template inside random frames
+    stream = np.concatenate([rng.random((5, 4)), np.repeat(template, 2, axis=0) + 0.01 * rng.standard_normal((12, 4)),
+                             rng.random((4, 4))])
+    
+    matcher = StreamingDTW(template.astype(np.float32))
+    for t in range(len(stream)):
+        score = matcher.update(stream[t].astype(np.float32))
+        assert score == pytest.approx(brute_force_subsequence_dtw(stream[:t + 1], template), rel=1e-4)
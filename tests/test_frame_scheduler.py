@@ -0,0 +1,48 @@
+import time
+import threading
+import pytest
+from frame_scheduler import FrameRateScheduler
+
+def test_goes_idle_after_idle_after_frames_without_a_hand():
+    scheduler = FrameRateScheduler(target_fps=30, idle_fps=5, idle_after=3)
+    for _ in range(2):
+        scheduler.report(False)
+    assert not scheduler.idle
+    assert scheduler.interval() == pytest.approx(1 / 30)
+    
+    scheduler.report(False)
+    assert scheduler.idle
+    assert scheduler.interval() == pytest.approx(1 / 5)
+    
+    # A single frame with a hand restores the full rate
+    scheduler.report(True)
+    assert not scheduler.idle
+    assert scheduler.frames_without_hand == 0
+
+def test_hand_wakes_an_idle_wait_early():
+    scheduler = FrameRateScheduler(target_fps=30, idle_fps=0.5, idle_after=1)
+    scheduler.report(False)
+    scheduler.wait()
+    # The next idle frame is two seconds away
+    waker = threading.Timer(0.1, scheduler.report, (True,))
+    waker.start()
+    start = time.perf_counter()
+    scheduler.wait()
+    waker.join()
+    assert time.perf_counter() - start < 1.0
+    assert not scheduler.idle
+
+def test_effective_fps_over_the_window(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "perf_counter", lambda: now[0])
+    scheduler = FrameRateScheduler(target_fps=10, window=2.0)
+    assert scheduler.effective_fps() == 0.0
+    
+    # A loop slower than the target: frames go out every 0.2 s, scheduled without catch-up
+    for _ in range(20):
+        scheduler.wait()
+        now[0] += 0.2
+    assert scheduler.effective_fps() == pytest.approx(5.0)
+    # Only the last two seconds count
+    assert scheduler.frame_times[-1] - scheduler.frame_times[0] <= 2.0
+    assert len(scheduler.frame_times) < 20
@@ -0,0 +1,213 @@
+import threading
+import pytest
+import numpy as np
+from gesture_recognizer import GestureRecognizer
+
+def pose(seed):
+    return np.random.default_rng(seed).random((21, 3)).astype(np.float32)
+
+def static_gesture(samples):
+    return {'samples': [np.asarray(s).tolist() for s in samples], 'action_type': 'keyboard', 'action_value': 'a'}
+
+def test_library_swap_is_atomic_for_recognition():
+    first, second = pose(1), pose(2)
+    # The same pose is the first gesture of one library and the second of the other,
+    # so names of one paired with templates of the other give a third answer
+    library_a = {'a_first': static_gesture([first]), 'a_second': static_gesture([second])}
+    library_b = {'b_first': static_gesture([second]), 'b_second': static_gesture([first])}
+    recognizer = GestureRecognizer(motion_epsilon=0)
+    recognizer.set_gesture_data(library_a)
+    
+    seen = set()
+    stop = threading.Event()
+    
+    def recognize():
+        while not stop.is_set():
+            seen.add(recognizer.recognize(first)[0])
+            seen.update(recognizer.recognize_hands(first[None], [0])[0][:1])
+    
+    worker = threading.Thread(target=recognize)
+    worker.start()
+    try:
+        for i in range(300):
+            recognizer.set_gesture_data(library_b if i % 2 == 0 else library_a)
+    finally:
+        stop.set()
+        worker.join()
+    assert seen <= {'a_first', 'b_second'}
+
+def baseline_scores(landmarks, gesture_data):
+    """Average squared distance to every gesture's samples, computed like the original nested loops"""
+    scores = {}
+    for name, data in gesture_data.items():
+        sample_scores = []
+        for sample in data['samples']:
+            total_distance = 0
+            for i in range(min(len(landmarks), len(sample))):
+                total_distance += sum((a - b) ** 2 for a, b in zip(landmarks[i], sample[i]))
+            sample_scores.append(total_distance)
+        scores[name] = sum(sample_scores) / len(sample_scores)
+    return scores
+
+def baseline_recognize(landmarks, gesture_data, threshold=0.1):
+    scores = baseline_scores(landmarks, gesture_data)
+    best_match = min(scores, key=scores.get)
+    best_score = scores[best_match]
+    confidence = max(0, min(100, int(100 * (1 - best_score / threshold))))
+    return (best_match if best_score < threshold else None), best_score, confidence
+
+def brute_force_knn(landmarks, gesture_data, k):
+    """Vote among the k nearest samples; most votes wins, ties go to the lower mean distance"""
+    neighbours = sorted((float(((np.asarray(sample) - landmarks) ** 2).sum()), name)
+                        for name, data in gesture_data.items() for sample in data['samples'])[:k]
+    votes = {}
+    for distance, name in neighbours:
+        votes.setdefault(name, []).append(distance)
+    most = max(len(distances) for distances in votes.values())
+    return min((np.mean(distances), name) for name, distances in votes.items() if len(distances) == most)[::-1]
+
+def library(n_gestures=4, n_samples=12, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    gesture_data = {}
+    for g in range(n_gestures):
+        base = rng.random((21, 3))
+        gesture_data[f"gesture_{g}"] = static_gesture(base + noise * rng.standard_normal((n_samples, 21, 3)))
+    return gesture_data
+
+def queries(gesture_data, seed=1):
+    """Noisy versions of every gesture plus a few poses unlike any of them"""
+    rng = np.random.default_rng(seed)
+    frames = [np.asarray(data['samples'][0]) + 0.01 * rng.standard_normal((21, 3))
+              for data in gesture_data.values()]
+    frames += [rng.random((21, 3)) for _ in range(3)]
+    return np.asarray(frames, dtype=np.float32)
+
+@pytest.mark.parametrize("use_prototypes", [False, True])
+@pytest.mark.parametrize("cascade", [False, True])
+def test_average_matches_baseline(use_prototypes, cascade):
+    gesture_data = library()
+    recognizer = GestureRecognizer(use_prototypes=use_prototypes, cascade=cascade, motion_epsilon=0)
+    recognizer.set_gesture_data(gesture_data)
+    
+    for frame in queries(gesture_data):
+        expected = baseline_recognize(frame.tolist(), gesture_data)
+        match, score, confidence = recognizer.recognize(frame)
+        assert match == expected[0]
+        assert score == pytest.approx(expected[1], rel=1e-4)
+        assert abs(confidence - expected[2]) <= 1
+
+def test_batch_and_hands_match_baseline():
+    gesture_data = library()
+    recognizer = GestureRecognizer(use_prototypes=False, motion_epsilon=0)
+    recognizer.set_gesture_data(gesture_data)
+    frames = queries(gesture_data)
+    expected = [baseline_recognize(frame.tolist(), gesture_data) for frame in frames]
+    
+    matches, scores, _ = recognizer.recognize_batch(frames, chunk_size=2)
+    assert list(matches) == [e[0] for e in expected]
+    assert scores == pytest.approx([e[1] for e in expected], rel=1e-4)
+    
+    results = recognizer.recognize_hands(frames, list(range(len(frames))))
+    assert [r[0] for r in results] == [e[0] for e in expected]
+
+@pytest.mark.parametrize("cascade", [False, True])
+@pytest.mark.parametrize("use_index", [False, True])
+def test_knn_matches_brute_force(cascade, use_index):
+    gesture_data = library()
+    recognizer = GestureRecognizer(mode="knn", k=5, use_prototypes=False, cascade=cascade, motion_epsilon=0)
+    recognizer.set_gesture_data(gesture_data)
+    if not use_index:
+        recognizer.index = None
+    elif recognizer.index is None:
+        pytest.skip("scipy is not installed")
+    
+    frames = queries(gesture_data)
+    for frame in frames:
+        name, score = brute_force_knn(frame, gesture_data, 5)
+        match, knn_score, _ = recognizer.recognize(frame)
+        assert knn_score == pytest.approx(score, rel=1e-4)
+        assert match == (name if score < recognizer.threshold else None)
+    
+    matches, scores, _ = recognizer.recognize_batch(frames)
+    assert scores == pytest.approx([brute_force_knn(frame, gesture_data, 5)[1] for frame in frames], rel=1e-4)
+
+@pytest.mark.parametrize("template_dtype", ["float16", "int8"])
+def test_quantized_layouts_agree_with_float32(template_dtype):
+    gesture_data = library()
+    recognizer = GestureRecognizer(use_prototypes=False, template_dtype=template_dtype, motion_epsilon=0)
+    recognizer.set_gesture_data(gesture_data)
+    
+    for frame in queries(gesture_data):
+        expected = baseline_recognize(frame.tolist(), gesture_data)
+        match, score, _ = recognizer.recognize(frame)
+        assert match == expected[0]
+        assert score == pytest.approx(expected[1], rel=0.02, abs=1e-4)
+    
+    report = recognizer.quantization_report()
+    assert report['agreement'] == 1.0
+    # No float copy of the rows is kept next to the quantized matrix
+    assert all('block' not in entry for entry in recognizer._sample_blocks.values())
+    assert report['retained_bytes'] < report['float32_retained_bytes'] / 2
+
+def test_classifier_agrees_with_baseline_on_clear_poses():
+    gesture_data = library()
+    recognizer = GestureRecognizer(backend="classifier", motion_epsilon=0)
+    recognizer.set_gesture_data(gesture_data)
+    
+    for frame in queries(gesture_data):
+        expected = baseline_recognize(frame.tolist(), gesture_data)
+        match, score, _ = recognizer.recognize(frame)
+        assert match == expected[0]
+        if match is not None:
+            # The score is the distance to the predicted gesture, which for
+            # rejected poses need not be the nearest one
+            assert score == pytest.approx(expected[1], rel=1e-3)
+
+@pytest.mark.parametrize("options", [{"mode": "knn"}, {"recheck": False}, {"backend": "classifier"}])
+def test_reused_landmark_buffer_is_not_a_cache_hit(options):
+    left, right = pose(1), pose(2)
+    recognizer = GestureRecognizer(**options)
+    recognizer.set_gesture_data({'left': static_gesture([left] * 5), 'right': static_gesture([right] * 5)})
+    
+    # One buffer refilled every frame, as the capture side does
+    buffer = np.empty((21, 3), dtype=np.float32)
+    buffer[:] = left
+    assert recognizer.recognize(buffer)[0] == 'left'
+    assert recognizer.recognize_hands(buffer[None], [0])[0][0] == 'left'
+    buffer[:] = right
+    assert recognizer.recognize(buffer)[0] == 'right'
+    assert recognizer.recognize_hands(buffer[None], [0])[0][0] == 'right'
+
+@pytest.mark.parametrize("options", [{}, {"features": "invariant"}, {"mode": "knn"}, {"backend": "classifier"}])
+def test_empty_batch(options):
+    recognizer = GestureRecognizer(**options)
+    recognizer.set_gesture_data(library())
+    for empty in (np.zeros((0, 21, 3), dtype=np.float32), []):
+        matches, scores, confidences = recognizer.recognize_batch(empty)
+        assert len(matches) == len(scores) == len(confidences) == 0
+
+def test_classifier_is_reloaded_while_the_library_matches(tmp_path, monkeypatch):
+    from gesture_classifier import SoftmaxClassifier
+    path = str(tmp_path / "model.npz")
+    gesture_data = library()
+    trained = GestureRecognizer(backend="classifier", model_path=path)
+    trained.set_gesture_data(gesture_data)
+    saved = SoftmaxClassifier.load(path)
+    assert saved.library_hash == trained.classifier.library_hash
+    
+    # Same library: the saved weights are used and nothing is retrained
+    def no_training(*args, **kwargs):
+        raise AssertionError("retrained although the library did not change")
+    with monkeypatch.context() as patch:
+        patch.setattr(SoftmaxClassifier, "fit", no_training)
+        reloaded = GestureRecognizer(backend="classifier", model_path=path)
+        reloaded.set_gesture_data(gesture_data)
+    assert np.array_equal(reloaded.classifier.weights, saved.weights)
+    
+    # A changed library retrains and rewrites the file
+    changed = dict(gesture_data, extra=static_gesture([pose(7)] * 3))
+    retrained = GestureRecognizer(backend="classifier", model_path=path)
+    retrained.set_gesture_data(changed)
+    rewritten = SoftmaxClassifier.load(path)
+    assert rewritten.library_hash != saved.library_hash
+    assert rewritten.weights.shape != saved.weights.shape
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("mediapipe")
+from inference_pool import HandInferencePool
+
+def test_dropped_and_stranded_frames_go_back_to_the_caller():
+    dropped = []
+    pool = HandInferencePool(2, slots_per_worker=1, on_drop=dropped.append)
+    small = [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(5)]
+    try:
+        for frame in small:
+            pool.submit(frame)
+        # Two slots: every later frame is handed back at once
+        assert [id(frame) for frame in dropped] == [id(frame) for frame in small[2:]]
+        
+        # A new frame shape reallocates the slots; the frames in flight are handed back too
+        large = np.zeros((96, 128, 3), dtype=np.uint8)
+        pool.submit(large)
+        assert {id(frame) for frame in dropped} == {id(frame) for frame in small}
+        assert pool.frame_shape == large.shape
+        
+        frame, landmarks, _ = pool.collect()
+        assert frame is large
+        assert landmarks.shape[1:] == (21, 3)
+    finally:
+        pool.stop()
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+from roi_tracker import HandROITracker
+
+def hand_at(x, y, size=0.05):
+    """(21, 3) landmarks spread around a point, in normalized image coordinates"""
+    rng = np.random.default_rng(0)
+    points = np.zeros((21, 3), dtype=np.float32)
+    points[:, 0] = x + size * (rng.random(21) - 0.5)
+    points[:, 1] = y + size * (rng.random(21) - 0.5)
+    return points
+
+class Scene:
+    """detect() stand-in that sees the hands inside whatever image it is given"""
+    
+    def __init__(self, frame_size):
+        self.frame_size = frame_size
+        self.hands = []
+        self.box = None
+    
+    def detect(self, image):
+        # Full frames are only downscaled; crops are located through the tracker's last box
+        x0, y0, x1, y1 = self.box or (0, 0, self.frame_size[0], self.frame_size[1])
+        width, height = self.frame_size
+        found = []
+        for hand in self.hands:
+            xs = hand[:, 0] * width
+            ys = hand[:, 1] * height
+            if xs.min() >= x0 and xs.max() <= x1 and ys.min() >= y0 and ys.max() <= y1:
+                local = hand.copy()
+                local[:, 0] = (xs - x0) / (x1 - x0)
+                local[:, 1] = (ys - y0) / (y1 - y0)
+                found.append(local)
+        return found, ["Right"] * len(found)
+
+def test_second_hand_outside_the_crop_is_found():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    scene = Scene((640, 480))
+    tracker = HandROITracker(scene.detect, inference_scale=0.5, track_roi=True, max_hands=2,
+                             full_frame_interval=5)
+    
+    # Route the scene through the box the tracker is about to crop
+    original = tracker._roi_box
+    def roi_box(landmarks, width, height):
+        scene.box = original(landmarks, width, height)
+        return scene.box
+    tracker._roi_box = roi_box
+    
+    scene.hands = [hand_at(0.2, 0.5)]
+    landmarks, _ = tracker.process(frame)
+    assert len(landmarks) == 1
+    
+    scene.hands.append(hand_at(0.8, 0.5))
+    counts = []
+    for _ in range(5):
+        scene.box = None
+        counts.append(len(tracker.process(frame)[0]))
+    assert counts[-1] == 2
+    
+    # Both hands tracked: the crop covers them and no more full passes are needed
+    full = tracker.frames_full
+    for _ in range(10):
+        scene.box = None
+        assert len(tracker.process(frame)[0]) == 2
+    assert tracker.frames_full == full
+
+def test_crops_and_full_frames_go_to_separate_detectors():
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    scene = Scene((640, 480))
+    scene.hands = [hand_at(0.3, 0.5)]
+    seen = {"full": [], "roi": []}
+    
+    def detector(mode):
+        def detect(image):
+            seen[mode].append(image.shape[:2])
+            return scene.detect(image)
+        return detect
+    tracker = HandROITracker(detector("full"), inference_scale=0.5, max_hands=2, full_frame_interval=3,
+                             detect_roi=detector("roi"))
+    original = tracker._roi_box
+    def roi_box(landmarks, width, height):
+        scene.box = original(landmarks, width, height)
+        return scene.box
+    tracker._roi_box = roi_box
+    
+    for _ in range(9):
+        scene.box = None
+        tracker.process(frame)
+    # Periodic full passes still run, but never on the crop model
+    assert seen["roi"] and set(seen["full"]) == {(240, 320)}
+    assert (240, 320) not in seen["roi"]
@@ -0,0 +1,80 @@
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+from frame_sources import SyntheticSource
+from runtime import GestureRuntime
+
+HAND = np.random.default_rng(1).random((21, 3)).astype(np.float32)
+
+def detect(image):
+    """Stand-in for MediaPipe: the same open hand in every frame"""
+    return [HAND.tolist()], ["Right"]
+
+def runtime(tmp_path, frames=None, realtime=False):
+    source = SyntheticSource(64, 48, realtime=realtime, frames=frames)
+    return GestureRuntime(source=source, realtime=realtime, gestures_path=str(tmp_path / "gestures.pkl"),
+                          detect=detect, track_roi=False)
+
+def test_start_stop_cancels_every_task(tmp_path):
+    async def scenario():
+        gesture_runtime = runtime(tmp_path, realtime=True)
+        await gesture_runtime.start()
+        tasks = list(gesture_runtime.tasks)
+        event = await asyncio.wait_for(gesture_runtime.subscribe().get(), 5)
+        await gesture_runtime.stop()
+        return event, tasks, gesture_runtime
+    
+    event, tasks, gesture_runtime = asyncio.run(scenario())
+    assert len(event['landmarks']) == 1
+    assert all(task.done() for task in tasks)
+    assert gesture_runtime.tasks == [] and gesture_runtime.source is None
+
+def test_record_save_and_recognize(tmp_path):
+    async def scenario():
+        async with runtime(tmp_path) as gesture_runtime:
+            samples = await asyncio.wait_for(gesture_runtime.record_samples(5), 5)
+            await gesture_runtime.save_gesture("open", {'samples': samples, 'action_type': 'keyboard',
+                                                        'action_value': 'a'})
+            
+            gesture_runtime.recognition_enabled = True
+            gesture_runtime.actions_enabled = False
+            events = gesture_runtime.subscribe(maxsize=100)
+            while True:
+                event = await asyncio.wait_for(events.get(), 5)
+                if event['results']:
+                    return samples, event['results']
+    
+    samples, results = asyncio.run(scenario())
+    assert len(samples) == 5 and np.allclose(samples[0], HAND)
+    assert results[0][1] == "open"
+    assert (tmp_path / "gestures.pkl").exists()
+
+def test_wait_finished_when_the_source_runs_out(tmp_path):
+    async def scenario():
+        async with runtime(tmp_path, frames=10) as gesture_runtime:
+            events = gesture_runtime.subscribe(maxsize=100)
+            await asyncio.wait_for(gesture_runtime.wait_finished(), 5)
+            return events.qsize()
+    
+    # Not realtime: every frame is processed before the end is signalled
+    assert asyncio.run(scenario()) == 10
+
+def test_inference_workers_deliver_every_frame(tmp_path):
+    pytest.importorskip("mediapipe")
+    from inference_pool import HandInferencePool
+    
+    async def scenario():
+        source = SyntheticSource(64, 48, realtime=False, frames=6)
+        gesture_runtime = GestureRuntime(source=source, realtime=False, gestures_path=str(tmp_path / "gestures.pkl"),
+                                         inference_pool=HandInferencePool(2))
+        async with gesture_runtime:
+            events = gesture_runtime.subscribe(maxsize=100)
+            await asyncio.wait_for(gesture_runtime.wait_finished(), 30)
+        return events.qsize(), gesture_runtime.inference_pool.workers
+    
+    # The frames still in the workers when the source ends are delivered too
+    count, workers = asyncio.run(scenario())
+    assert count == 6
+    assert workers == []